@@ -0,0 +1,495 @@
+"""Local stand-in for the Ops Manager and Atlas APIs used by Janus.
+
+Serves the endpoints Janus calls, with digest authentication, pagination,
+configurable latency and injected 429/5xx responses:
+
+    GET  /api/public/v1.0/groups
+    GET  /api/public/v1.0/groups/{id}/alertConfigs
+    POST /api/public/v1.0/groups/{id}/alertConfigs
+    GET  /api/public/v1.0/groups/{id}/automationConfig
+    GET  /api/public/v1.0/groups/{id}/automationStatus
+    GET  /api/atlas/v2/groups/{id}/customDBRoles/roles
+    POST /api/atlas/v2/groups/{id}/customDBRoles/roles
+    GET  /api/atlas/v2/groups/{id}/databaseUsers
+    POST /api/atlas/v2/groups/{id}/databaseUsers
+
+The same server acts as source and destination: projects are generated
+deterministically from their index, and what Janus creates is kept in
+memory until /_reset. GET /_stats returns request counters. Both of these
+endpoints need no authentication.
+
+    python -m bench.mock_server --projects 1000 --port 8080 --latency 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+REALM = "MMS Public API"
+MAX_ITEMS_PER_PAGE = 500
+
+_AUTH_FIELD = re.compile(r'(\w+)=(?:"([^"]*)"|([^,\s]*))')
+_GROUP_PATH = re.compile(
+    r"^/api/(?:public/v1\.0|atlas/v2)/groups/(?P<group>[^/]+)/(?P<resource>.+?)/?$"
+)
+
+
+@dataclass
+class MockSettings:
+    """Shape of the generated data and the faults injected into responses."""
+
+    projects: int = 10
+    alert_configs: int = 20
+    users: int = 10
+    roles: int = 3
+    processes: int = 20
+    latency: float = 0.0
+    rate_429: float = 0.0
+    error_rate: float = 0.0
+    retry_after: str = "0"
+    username: str = "janus"
+    apikey: str = "janus-key"
+    seed: Optional[int] = None
+
+
+def _md5(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class MockState:
+    """Generated source data, created destination objects and request counters."""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.nonce = secrets.token_hex(16)
+        self.random = random.Random(settings.seed)
+        self.lock = threading.Lock()
+        self.projects = [
+            {"id": "%024x" % (i + 1), "name": "project-%05d" % i}
+            for i in range(settings.projects)
+        ]
+        self._index = {p["id"]: i for i, p in enumerate(self.projects)}
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.created_alert_configs: dict[str, list[Any]] = {}
+            self.created_roles: dict[str, dict[str, Any]] = {}
+            self.created_users: dict[str, dict[tuple[str, str], Any]] = {}
+            self.requests: Counter = Counter()
+            self.statuses: Counter = Counter()
+            self.bytes_sent = 0
+            self.started = time.monotonic()
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "byEndpoint": {" ".join(k): v for k, v in self.requests.items()},
+                "byStatus": {str(k): v for k, v in self.statuses.items()},
+                "bytesSent": self.bytes_sent,
+                "seconds": time.monotonic() - self.started,
+                "created": {
+                    "alertConfigs": sum(
+                        len(v) for v in self.created_alert_configs.values()
+                    ),
+                    "customRoles": sum(len(v) for v in self.created_roles.values()),
+                    "databaseUsers": sum(len(v) for v in self.created_users.values()),
+                },
+            }
+
+    def inject_fault(self) -> Optional[int]:
+        with self.lock:
+            draw = self.random.random()
+        if draw < self.settings.rate_429:
+            return 429
+        if draw < self.settings.rate_429 + self.settings.error_rate:
+            return 500
+        return None
+
+    def project_index(self, group: str) -> Optional[int]:
+        return self._index.get(group)
+
+    def alert_configs(self, index: int) -> list[dict[str, Any]]:
+        # Most projects share the same configs, as real organizations do
+        return [
+            {
+                "id": "%08x%016x" % (index, n),
+                "groupId": self.projects[index]["id"],
+                "eventTypeName": "OUTSIDE_METRIC_THRESHOLD",
+                "enabled": True,
+                "matchers": [],
+                "metricThreshold": {
+                    "metricName": "ASSERT_REGULAR",
+                    "operator": "GREATER_THAN",
+                    "threshold": 10.0 + n,
+                    "units": "RAW",
+                    "mode": "AVERAGE",
+                },
+                "notifications": [
+                    {"typeName": "GROUP", "intervalMin": 5, "delayMin": 0}
+                ],
+                "created": "2024-01-01T00:00:00Z",
+                "updated": "2024-01-01T00:00:00Z",
+                "links": [],
+            }
+            for n in range(self.settings.alert_configs)
+        ]
+
+    def config_version(self, index: int) -> int:
+        return index + 1
+
+    def automation_status(self, index: int) -> dict[str, Any]:
+        version = self.config_version(index)
+        return {
+            "goalVersion": version,
+            "processes": [
+                {
+                    "name": "%s_%d" % (self.projects[index]["name"], n),
+                    "hostname": "host%d.example.com" % n,
+                    "lastGoalVersionAchieved": version,
+                    "plan": [],
+                }
+                for n in range(self.settings.processes)
+            ],
+        }
+
+    def automation_config(self, index: int) -> dict[str, Any]:
+        settings = self.settings
+        roles = [
+            {
+                "role": "appRole%d" % n,
+                "db": "admin",
+                "privileges": [
+                    {
+                        "resource": {"db": "app%d" % n, "collection": ""},
+                        "actions": ["find", "insert", "update"],
+                    }
+                ],
+                # Each role inherits from the previous one
+                "roles": [{"role": "appRole%d" % (n - 1), "db": "admin"}] if n else [],
+            }
+            for n in range(settings.roles)
+        ]
+        users = [
+            {
+                "user": "user%d" % n,
+                "db": "admin",
+                "roles": [
+                    {"role": "readWrite", "db": "app%d" % (n % 5)},
+                    (
+                        {"role": "appRole%d" % (n % settings.roles), "db": "admin"}
+                        if settings.roles
+                        else {"role": "read", "db": "admin"}
+                    ),
+                ],
+                "authenticationRestrictions": [],
+                "mechanisms": ["SCRAM-SHA-256"],
+                "scramSha256Creds": {
+                    "iterationCount": 15000,
+                    "salt": "c2FsdA==",
+                    "serverKey": "a2V5",
+                    "storedKey": "a2V5",
+                },
+            }
+            for n in range(settings.users)
+        ]
+        processes = [
+            {
+                "name": "%s_%d" % (self.projects[index]["name"], n),
+                "processType": "mongod",
+                "version": "7.0.12",
+                "hostname": "host%d.example.com" % n,
+                "args2_6": {
+                    "net": {"port": 27017},
+                    "storage": {"dbPath": "/data/db"},
+                    "systemLog": {"destination": "file", "path": "/var/log/mongod.log"},
+                },
+            }
+            for n in range(settings.processes)
+        ]
+        return {
+            "version": self.config_version(index),
+            "auth": {"usersWanted": users, "usersDeleted": [], "disabled": False},
+            "roles": roles,
+            "processes": processes,
+            "replicaSets": [],
+        }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Buffer each response so headers and body leave in one packet
+    wbufsize = 1 << 16
+    server: "MockServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(
+        self, status: int, body: Any = None, headers: Optional[dict] = None
+    ) -> None:
+        payload = b"" if body is None else json.dumps(body).encode()
+        headers = dict(headers or {})
+        if status == 200 and self.command == "GET":
+            # Lets clients revalidate cached listings with If-None-Match
+            headers["ETag"] = '"%s"' % hashlib.md5(payload).hexdigest()
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                status, payload = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        state = self.server.state
+        with state.lock:
+            state.statuses[status] += 1
+            state.bytes_sent += len(payload)
+
+    def _authorized(self) -> bool:
+        header = self.headers.get("Authorization", "")
+        if not header.startswith("Digest "):
+            return False
+        fields = {
+            key: quoted or bare
+            for key, quoted, bare in _AUTH_FIELD.findall(header[len("Digest ") :])
+        }
+        state = self.server.state
+        if fields.get("nonce") != state.nonce or fields.get("username") != (
+            state.settings.username
+        ):
+            return False
+        ha1 = _md5("%s:%s:%s" % (state.settings.username, REALM, state.settings.apikey))
+        ha2 = _md5("%s:%s" % (self.command, fields.get("uri", "")))
+        if fields.get("qop"):
+            expected = _md5(
+                ":".join(
+                    [
+                        ha1,
+                        fields["nonce"],
+                        fields.get("nc", ""),
+                        fields.get("cnonce", ""),
+                        fields["qop"],
+                        ha2,
+                    ]
+                )
+            )
+        else:
+            expected = _md5("%s:%s:%s" % (ha1, fields["nonce"], ha2))
+        return fields.get("response") == expected
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _paginate(self, items: list[Any], query: dict[str, list[str]]) -> dict:
+        page = max(int(query.get("pageNum", ["1"])[0]), 1)
+        per_page = min(int(query.get("itemsPerPage", ["100"])[0]), MAX_ITEMS_PER_PAGE)
+        start = (page - 1) * per_page
+        return {
+            "results": items[start : start + per_page],
+            "totalCount": len(items),
+            "links": [],
+        }
+
+    def _handle(self) -> None:
+        state = self.server.state
+        split = urlsplit(self.path)
+        body = self._read_body()
+
+        if split.path == "/_stats":
+            return self._send(200, state.stats())
+        if split.path == "/_reset":
+            state.reset()
+            return self._send(200, {})
+
+        if not self._authorized():
+            return self._send(
+                401,
+                {"error": 401, "reason": "Unauthorized"},
+                {
+                    "WWW-Authenticate": 'Digest realm="%s", domain="", nonce="%s", '
+                    'algorithm=MD5, qop="auth", stale=false' % (REALM, state.nonce)
+                },
+            )
+
+        if state.settings.latency:
+            time.sleep(state.settings.latency)
+
+        query = parse_qs(split.query)
+        if split.path.rstrip("/") == "/api/public/v1.0/groups":
+            endpoint = "groups"
+        else:
+            match = _GROUP_PATH.match(split.path)
+            endpoint = match.group("resource") if match else split.path
+        with state.lock:
+            state.requests[(self.command, endpoint)] += 1
+
+        fault = state.inject_fault()
+        if fault == 429:
+            return self._send(
+                429,
+                {"error": 429, "reason": "Too Many Requests"},
+                {"Retry-After": state.settings.retry_after},
+            )
+        if fault is not None:
+            return self._send(fault, {"error": fault, "reason": "Injected error"})
+
+        if endpoint == "groups" and self.command == "GET":
+            return self._send(200, self._paginate(state.projects, query))
+
+        match = _GROUP_PATH.match(split.path)
+        index = state.project_index(match.group("group")) if match else None
+        if index is None:
+            return self._send(404, {"error": 404, "reason": "Not Found"})
+        group = state.projects[index]["id"]
+
+        if endpoint == "alertConfigs":
+            if self.command == "GET":
+                items = state.alert_configs(index) + state.created_alert_configs.get(
+                    group, []
+                )
+                return self._send(200, self._paginate(items, query))
+            created = dict(body or {}, id=secrets.token_hex(12), groupId=group)
+            with state.lock:
+                state.created_alert_configs.setdefault(group, []).append(created)
+            return self._send(201, created)
+
+        if endpoint == "automationConfig" and self.command == "GET":
+            return self._send(200, state.automation_config(index))
+
+        if endpoint == "automationStatus" and self.command == "GET":
+            return self._send(200, state.automation_status(index))
+
+        if endpoint == "customDBRoles/roles":
+            roles = state.created_roles.setdefault(group, {})
+            if self.command == "GET":
+                # Atlas returns the custom roles as a bare list
+                return self._send(200, list(roles.values()))
+            with state.lock:
+                duplicate = body["roleName"] in roles
+                # Like Atlas, inherited custom roles must already exist
+                missing = [
+                    inherited["role"]
+                    for inherited in body.get("inheritedRoles", [])
+                    if inherited["role"].startswith("appRole")
+                    and inherited["role"] not in roles
+                ]
+                if not duplicate and not missing:
+                    roles[body["roleName"]] = body
+            if duplicate:
+                return self._send(409, {"error": 409, "errorCode": "DUPLICATE"})
+            if missing:
+                return self._send(
+                    400,
+                    {
+                        "error": 400,
+                        "errorCode": "ATLAS_INVALID_ROLE",
+                        "detail": missing,
+                    },
+                )
+            return self._send(201, body)
+
+        if endpoint == "databaseUsers":
+            users = state.created_users.setdefault(group, {})
+            if self.command == "GET":
+                return self._send(200, self._paginate(list(users.values()), query))
+            key = (body["username"], body["databaseName"])
+            created = {k: v for k, v in body.items() if k != "password"}
+            with state.lock:
+                duplicate = key in users
+                if not duplicate:
+                    users[key] = created
+            if duplicate:
+                return self._send(409, {"error": 409, "errorCode": "DUPLICATE"})
+            return self._send(201, created)
+
+        return self._send(404, {"error": 404, "reason": "Not Found"})
+
+    do_GET = do_POST = _handle
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, settings: MockSettings, host: str = "127.0.0.1", port: int = 0):
+        self.state = MockState(settings)
+        super().__init__((host, port), MockHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self) -> "MockServer":
+        """Serve on a background thread."""
+        threading.Thread(
+            target=self.serve_forever, name="mock-server", daemon=True
+        ).start()
+        return self
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--projects", type=int, default=MockSettings.projects)
+    parser.add_argument("--alertConfigs", type=int, default=MockSettings.alert_configs)
+    parser.add_argument("--users", type=int, default=MockSettings.users)
+    parser.add_argument("--roles", type=int, default=MockSettings.roles)
+    parser.add_argument("--processes", type=int, default=MockSettings.processes)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per request"
+    )
+    parser.add_argument(
+        "--rate429", type=float, default=0.0, help="Share of 429 answers"
+    )
+    parser.add_argument(
+        "--errorRate", type=float, default=0.0, help="Share of 500 answers"
+    )
+    parser.add_argument("--retryAfter", default="0", help="Retry-After sent with 429")
+    parser.add_argument("--username", default=MockSettings.username)
+    parser.add_argument("--apiKey", default=MockSettings.apikey)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        projects=args.projects,
+        alert_configs=args.alertConfigs,
+        users=args.users,
+        roles=args.roles,
+        processes=args.processes,
+        latency=args.latency,
+        rate_429=args.rate429,
+        error_rate=args.errorRate,
+        retry_after=args.retryAfter,
+        username=args.username,
+        apikey=args.apiKey,
+        seed=args.seed,
+    )
+    server = MockServer(settings, args.host, args.port)
+    print("Mock Ops Manager/Atlas listening on %s" % server.url)
+    print("Credentials: %s / %s" % (settings.username, settings.apikey))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Statistical checks and throughput of the password generator.
+
+Generates a large batch with the default policy (or the given one) and
+checks that every character is equally likely at every position, with a
+chi-square test against the distribution of valid passwords, and that every
+password has the policy length and all required classes. Exits non-zero
+when a check fails.
+
+    python -m bench.passwords --count 200000
+    python -m bench.passwords --length 8 --classes lower,digits
+"""
+
+import argparse
+import math
+import sys
+import time
+
+from janus.passwords import (
+    CHARACTER_CLASSES,
+    PasswordGenerator,
+    PasswordPolicy,
+    policy_from_names,
+)
+
+
+def expected_frequencies(policy: PasswordPolicy) -> dict[str, float]:
+    """Probability of each character at any position of a valid password.
+
+    Valid passwords are uniform over all strings containing every required
+    class. By inclusion-exclusion over the classes left out, a character c
+    appears at a given position in a share of
+
+        sum over subsets S of the required classes not holding c of
+            (-1)^|S| * n(S) ** (length - 1) / valid
+
+    where n(S) counts the alphabet characters outside the classes in S.
+    """
+    alphabet = policy.alphabet
+    required = [set(c) for c in policy.required_classes]
+    length = policy.length
+
+    def count(excluded: list[set[str]], positions: int) -> int:
+        total = 0
+        for mask in range(1 << len(excluded)):
+            chosen = [c for i, c in enumerate(excluded) if mask >> i & 1]
+            size = len(set(alphabet) - set().union(*chosen))
+            total += (-1) ** len(chosen) * size**positions
+        return total
+
+    valid = count(required, length)
+    return {
+        c: count([r for r in required if c not in r], length - 1) / valid
+        for c in alphabet
+    }
+
+
+def chi_square_p_value(statistic: float, dof: int) -> float:
+    """Upper tail of the chi-square distribution (Wilson-Hilferty)."""
+    z = ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--length", type=int, default=PasswordPolicy.length)
+    parser.add_argument(
+        "--classes",
+        default=",".join(CHARACTER_CLASSES),
+        help="Comma separated classes: %s" % ", ".join(CHARACTER_CLASSES),
+    )
+    parser.add_argument("--alpha", type=float, default=0.001, help="Significance level")
+    args = parser.parse_args()
+
+    policy = policy_from_names(args.length, args.classes)
+    generator = PasswordGenerator(policy)
+
+    started = time.perf_counter()
+    passwords = generator.generate(args.count)
+    seconds = time.perf_counter() - started
+    print(
+        "%d passwords in %.3fs (%.0f passwords/s)"
+        % (len(passwords), seconds, len(passwords) / seconds)
+    )
+
+    failures = []
+    required = [set(c) for c in policy.required_classes]
+    invalid = sum(
+        len(p) != policy.length or any(set(p).isdisjoint(c) for c in required)
+        for p in passwords
+    )
+    if invalid:
+        failures.append("%d password(s) break the policy" % invalid)
+
+    expected = expected_frequencies(policy)
+    for position in range(policy.length):
+        observed = dict.fromkeys(expected, 0)
+        for password in passwords:
+            observed[password[position]] += 1
+        statistic = sum(
+            (observed[c] - args.count * p) ** 2 / (args.count * p)
+            for c, p in expected.items()
+        )
+        p_value = chi_square_p_value(statistic, len(expected) - 1)
+        if p_value < args.alpha:
+            failures.append(
+                "position %d: chi-square %.1f, p=%.2g" % (position, statistic, p_value)
+            )
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("OK: %d positions uniform at alpha=%g" % (policy.length, args.alpha))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Planning checks of the custom role creation waves.
+
+Runs plan_role_waves on small role graphs and compares the waves and the
+reasons given for the roles left out with the expected ones. Exits non-zero
+when a case fails.
+
+    python -m bench.roles
+"""
+
+import sys
+from typing import Any, Optional
+
+from janus.roles import plan_role_waves
+
+
+def role(name: str, *inherits: str, db: str = "admin") -> dict[str, Any]:
+    return {
+        "role": name,
+        "db": db,
+        "roles": [{"role": r, "db": "admin"} for r in inherits],
+    }
+
+
+# (name, roles, existing destination roles, expected waves, expected invalid,
+# expected duplicates)
+CASES: list[
+    tuple[
+        str,
+        list[dict[str, Any]],
+        Optional[list[str]],
+        list[list[str]],
+        dict[str, str],
+        list[str],
+    ]
+] = [
+    (
+        "chain",
+        [role("c", "b"), role("b", "a"), role("a", "read")],
+        [],
+        [["a"], ["b"], ["c"]],
+        {},
+        [],
+    ),
+    (
+        "existing dependency",
+        [role("b", "a")],
+        ["a"],
+        [["b"]],
+        {},
+        [],
+    ),
+    (
+        "unknown destination",
+        [role("b", "a")],
+        None,
+        [["b"]],
+        {},
+        [],
+    ),
+    (
+        "chain on a missing role",
+        [role("a", "x"), role("b", "a"), role("c", "b")],
+        [],
+        [],
+        {
+            "a": "missing inherited role(s) x",
+            "b": "depends on invalid role(s) a",
+            "c": "depends on invalid role(s) b",
+        },
+        [],
+    ),
+    (
+        "chain on a missing role next to a valid role",
+        [role("a", "x"), role("b", "a"), role("c", "b"), role("d")],
+        [],
+        [["d"]],
+        {
+            "a": "missing inherited role(s) x",
+            "b": "depends on invalid role(s) a",
+            "c": "depends on invalid role(s) b",
+        },
+        [],
+    ),
+    (
+        "cycle",
+        [role("a", "b"), role("b", "a"), role("c", "a"), role("d")],
+        [],
+        [["d"]],
+        {
+            "a": "dependency cycle through b",
+            "b": "dependency cycle through a",
+            "c": "depends on role(s) in a dependency cycle: a",
+        },
+        [],
+    ),
+    (
+        "self",
+        [role("a", "a")],
+        [],
+        [],
+        {"a": "inherits from itself"},
+        [],
+    ),
+    (
+        "same name on another db",
+        [role("a"), role("b", "a"), role("a", "read", db="sales")],
+        [],
+        [["a"], ["b"]],
+        {},
+        ["a"],
+    ),
+    (
+        "same role twice",
+        [role("a"), role("a")],
+        [],
+        [["a"]],
+        {},
+        [],
+    ),
+]
+
+
+def main() -> None:
+    failures = 0
+    for (
+        name,
+        roles,
+        existing,
+        expected_waves,
+        expected_invalid,
+        expected_duplicates,
+    ) in CASES:
+        waves, invalid, duplicates = plan_role_waves(roles, existing)
+        names = [[r["role"] for r in wave] for wave in waves]
+        duplicate_names = [r["role"] for r in duplicates]
+        if (
+            names == expected_waves
+            and invalid == expected_invalid
+            and duplicate_names == expected_duplicates
+        ):
+            print("OK  ", name)
+            continue
+        failures += 1
+        print("FAIL", name)
+        print("     waves:   %s, expected %s" % (names, expected_waves))
+        print("     invalid: %s, expected %s" % (invalid, expected_invalid))
+        print(
+            "     duplicates: %s, expected %s" % (duplicate_names, expected_duplicates)
+        )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
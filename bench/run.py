@@ -0,0 +1,369 @@
+"""End-to-end benchmarks of the Janus CLI against the local mock server.
+
+Each scenario runs `python -m janus ...` unattended in a subprocess against
+two mock servers, a source holding the generated projects and an empty
+destination with the same projects, and reports wall-clock time, requests
+served, the resulting requests/sec and the peak RSS of the Janus process.
+
+    python -m bench.run --scales 10,1000 --latency 0.01
+    python -m bench.run --scenarios db-users-migrate --scales 10000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from dataclasses import asdict, dataclass, replace
+from typing import Callable, Optional
+
+from bench.mock_server import MockServer, MockSettings
+
+DEFAULT_SCALES = "10,1000,10000"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Servers:
+    source: MockServer
+    destination: MockServer
+
+    def reset(self) -> None:
+        self.source.state.reset()
+        self.destination.state.reset()
+
+    def stop(self) -> None:
+        for server in (self.source, self.destination):
+            server.shutdown()
+            server.server_close()
+
+
+@dataclass
+class BenchResult:
+    scenario: str
+    projects: int
+    seconds: float
+    requests: int
+    requests_per_second: float
+    errors: int
+    peak_rss_mb: float
+    exit_code: int
+
+
+def _source(servers: "Servers") -> list[str]:
+    server = servers.source
+    settings = server.state.settings
+    return [
+        "--sourceUrl",
+        server.url,
+        "--sourceUsername",
+        settings.username,
+        "--sourceApiKey",
+        settings.apikey,
+    ]
+
+
+def _destination(servers: "Servers") -> list[str]:
+    server = servers.destination
+    settings = server.state.settings
+    return [
+        "--destinationUrl",
+        server.url,
+        "--destinationUsername",
+        settings.username,
+        "--destinationApiKey",
+        settings.apikey,
+    ]
+
+
+def _concurrency(args: argparse.Namespace) -> list[str]:
+    return ["--concurrency", str(args.concurrency)]
+
+
+# Scenario name -> (setup scenario run first, untimed, or None; janus arguments)
+SCENARIOS: dict[
+    str,
+    tuple[
+        Optional[str],
+        Callable[["Servers", argparse.Namespace], list[str]],
+    ],
+] = {
+    "alert-configs-export": (
+        None,
+        lambda servers, args: ["alert-configs", "export"]
+        + _source(servers)
+        + ["--outputFile", "alert-configs.ndjson", "--allProjects"]
+        + _concurrency(args),
+    ),
+    "alert-configs-import": (
+        "alert-configs-export",
+        lambda servers, args: ["alert-configs", "import"]
+        + _destination(servers)
+        + ["--inputFile", "alert-configs.ndjson", "--projectMap", "project-map.yaml"]
+        + _concurrency(args),
+    ),
+    "db-users-export": (
+        None,
+        lambda servers, args: ["db-users", "export"]
+        + _source(servers)
+        + ["--outputFile", "db-users.ndjson", "--allProjects"]
+        + _concurrency(args),
+    ),
+    # Steady state of a nightly drift sync: a second run with nothing changed
+    "db-users-export-incremental": (
+        "db-users-export-incremental",
+        lambda servers, args: ["db-users", "export"]
+        + _source(servers)
+        + [
+            "--outputFile",
+            "db-users-delta.ndjson",
+            "--allProjects",
+            "--incremental",
+        ]
+        + _concurrency(args),
+    ),
+    "db-users-import": (
+        "db-users-export",
+        lambda servers, args: ["db-users", "import"]
+        + _destination(servers)
+        + [
+            "--inputFile",
+            "db-users.ndjson",
+            "--passwordOutputFile",
+            "passwords.csv",
+            "--projectMap",
+            "project-map.yaml",
+        ]
+        + _concurrency(args),
+    ),
+    "db-users-migrate": (
+        None,
+        lambda servers, args: ["db-users", "migrate"]
+        + _source(servers)
+        + _destination(servers)
+        + [
+            "--outputFile",
+            "db-users.ndjson",
+            "--passwordOutputFile",
+            "passwords.csv",
+            "--allProjects",
+            "--projectMap",
+            "project-map.yaml",
+        ]
+        + _concurrency(args),
+    ),
+}
+
+
+def _global_options(args: argparse.Namespace) -> list[str]:
+    return [
+        "--engine",
+        args.engine,
+        "--rate-limit",
+        str(args.rate_limit),
+        "--max-retries",
+        str(args.max_retries),
+    ]
+
+
+def _run_janus(argv: list[str], workdir: str, log) -> tuple[int, float, float]:
+    """Run janus and return (exit code, wall seconds, peak RSS in MB)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [REPO_ROOT, env.get("PYTHONPATH")])
+    )
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "janus"] + argv,
+        cwd=workdir,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    # wait4 reports the resource usage of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return process.returncode, seconds, usage.ru_maxrss / divisor
+
+
+def _stats(server: MockServer) -> dict:
+    with urllib.request.urlopen(server.url + "/_stats") as response:
+        return json.load(response)
+
+
+def run_scenario(
+    name: str, servers: Servers, args: argparse.Namespace, workdir: str
+) -> BenchResult:
+    setup, build = SCENARIOS[name]
+    with open(os.path.join(workdir, "janus-output.log"), "a") as log:
+        if setup is not None:
+            servers.reset()
+            code, _, _ = _run_janus(
+                _global_options(args) + SCENARIOS[setup][1](servers, args),
+                workdir,
+                log,
+            )
+            if code != 0:
+                raise RuntimeError("Setup %s failed with exit code %d" % (setup, code))
+        servers.reset()
+        code, seconds, rss = _run_janus(
+            _global_options(args) + build(servers, args), workdir, log
+        )
+    requests = 0
+    errors = 0
+    for server in (servers.source, servers.destination):
+        stats = _stats(server)
+        requests += stats["requests"]
+        errors += sum(
+            count
+            for status, count in stats["byStatus"].items()
+            if int(status) >= 400 and int(status) not in (401, 409)
+        )
+    return BenchResult(
+        scenario=name,
+        projects=servers.source.state.settings.projects,
+        seconds=round(seconds, 3),
+        requests=requests,
+        requests_per_second=round(requests / seconds, 1) if seconds else 0.0,
+        errors=errors,
+        peak_rss_mb=round(rss, 1),
+        exit_code=code,
+    )
+
+
+def _print_table(results: list[BenchResult]) -> None:
+    header = "%-28s %9s %10s %10s %10s %8s %10s %5s" % (
+        "scenario",
+        "projects",
+        "seconds",
+        "requests",
+        "req/s",
+        "errors",
+        "RSS (MB)",
+        "exit",
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            "%-28s %9d %10.2f %10d %10.1f %8d %10.1f %5d"
+            % (
+                r.scenario,
+                r.projects,
+                r.seconds,
+                r.requests,
+                r.requests_per_second,
+                r.errors,
+                r.peak_rss_mb,
+                r.exit_code,
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Comma separated scenarios: %s" % ", ".join(SCENARIOS),
+    )
+    parser.add_argument(
+        "--scales", default=DEFAULT_SCALES, help="Comma separated project counts"
+    )
+    parser.add_argument("--alertConfigs", type=int, default=MockSettings.alert_configs)
+    parser.add_argument("--users", type=int, default=MockSettings.users)
+    parser.add_argument("--roles", type=int, default=MockSettings.roles)
+    parser.add_argument("--processes", type=int, default=MockSettings.processes)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per request"
+    )
+    parser.add_argument(
+        "--rate429", type=float, default=0.0, help="Share of 429 answers"
+    )
+    parser.add_argument(
+        "--errorRate", type=float, default=0.0, help="Share of 500 answers"
+    )
+    parser.add_argument("--engine", default="sync", choices=["sync", "async"])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=float,
+        default=0,
+        help="Janus --rate-limit (default: unlimited)",
+    )
+    parser.add_argument("--max-retries", dest="max_retries", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the working directories"
+    )
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error("unknown scenario(s): %s" % ", ".join(unknown))
+
+    results = []
+    for scale in (int(s) for s in args.scales.split(",")):
+        settings = MockSettings(
+            projects=scale,
+            alert_configs=args.alertConfigs,
+            users=args.users,
+            roles=args.roles,
+            processes=args.processes,
+            latency=args.latency,
+            rate_429=args.rate429,
+            error_rate=args.errorRate,
+            seed=args.seed,
+        )
+        servers = Servers(
+            MockServer(settings).start(),
+            # Same projects, nothing created in them yet
+            MockServer(replace(settings, alert_configs=0)).start(),
+        )
+        workdir = tempfile.mkdtemp(prefix="janus-bench-%d-" % scale)
+        with open(os.path.join(workdir, "project-map.yaml"), "w") as mapfile:
+            mapfile.write("default: auto\n")
+        with open(os.path.join(workdir, "config.yaml"), "w") as config:
+            config.write("verify_ssl: true\n")
+        try:
+            for name in scenarios:
+                result = run_scenario(name, servers, args, workdir)
+                results.append(result)
+                print(
+                    "%s @ %d projects: %.2fs, %.1f req/s, %.1f MB"
+                    % (
+                        name,
+                        scale,
+                        result.seconds,
+                        result.requests_per_second,
+                        result.peak_rss_mb,
+                    ),
+                    file=sys.stderr,
+                )
+        finally:
+            servers.stop()
+            if args.keep:
+                print("Kept %s" % workdir, file=sys.stderr)
+            else:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    _print_table(results)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump([asdict(r) for r in results], outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['yaml'],
+    hiddenimports=['yaml', 'janus.alert_configs_cli', 'janus.db_users_cli'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
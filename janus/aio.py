@@ -0,0 +1,552 @@
+"""asyncio transport engine, selected with ``janus --engine async``.
+
+Implements the same fetch/create operations as the synchronous helpers in
+alert_configs_cli and db_users_cli on top of aiohttp, so a single thread can
+keep hundreds of requests in flight. Digest auth is handled here (aiohttp has
+no built-in support) and the nonce is reused with an incrementing nc, a
+semaphore bounds the in-flight requests per host, and cancelling the run
+(e.g. Ctrl-C) cancels every outstanding request.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional, TypeVar
+from urllib.parse import urlencode, urlsplit
+
+import aiohttp
+import requests
+from requests.utils import parse_dict_header
+
+from janus import metrics
+from janus.cache import get_cache
+from janus.client import DEFAULT_HEADERS, _host_key
+from janus.jsonstream import STREAM_CHUNK_SIZE, iter_decoded, select_fields
+from janus.logging import DebugPayload, logger
+from janus.pagination import ITEMS_PER_PAGE
+from janus.retry import (
+    RETRY_STATUSES,
+    get_bucket,
+    get_host_concurrency,
+    get_policy,
+    record_failure,
+)
+
+T = TypeVar("T")
+
+ATLAS_POST_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/vnd.atlas.2023-02-01+json",
+}
+
+_HASHES = {
+    "MD5": hashlib.md5,
+    "SHA": hashlib.sha1,
+    "SHA-256": hashlib.sha256,
+    "SHA-512": hashlib.sha512,
+}
+
+
+class AsyncResponse:
+    """Fully read response exposing the parts of requests.Response Janus uses."""
+
+    def __init__(self, method: str, url: str, status: int, reason: str, headers, body):
+        self.method = method
+        self.url = url
+        self.status_code = status
+        self.reason = reason
+        self.headers = headers
+        self.content = body
+        self.request = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        view = memoryview(self.content)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start : start + chunk_size])
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error: {self.reason} for url: {self.url}",
+                response=self,
+            )
+
+
+class _DigestState:
+    """Digest challenge and nonce count shared by all requests to one host."""
+
+    def __init__(self, username: str, apikey: str):
+        self.username = username
+        self.apikey = apikey
+        self.chal: dict = {}
+        self.nonce_count = 0
+        self.lock = asyncio.Lock()
+        self.primed = False
+
+    def update(self, header: str) -> bool:
+        if not header.lower().startswith("digest "):
+            return False
+        chal = parse_dict_header(header[len("digest ") :])
+        if chal.get("nonce") != self.chal.get("nonce"):
+            self.nonce_count = 0
+        self.chal = chal
+        return True
+
+    def header(self, method: str, url: str) -> Optional[str]:
+        if not self.chal:
+            return None
+        realm = self.chal["realm"]
+        nonce = self.chal["nonce"]
+        qop = self.chal.get("qop")
+        algorithm = self.chal.get("algorithm", "MD5").upper()
+        opaque = self.chal.get("opaque")
+        session = algorithm.endswith("-SESS")
+        hash_func = _HASHES.get(algorithm[:-5] if session else algorithm)
+        if hash_func is None or (qop and "auth" not in qop.split(",")):
+            return None
+
+        def digest(value: str) -> str:
+            return hash_func(value.encode("utf-8")).hexdigest()
+
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        self.nonce_count += 1
+        ncvalue = f"{self.nonce_count:08x}"
+        cnonce = hashlib.sha1(
+            f"{self.nonce_count}{nonce}{time.ctime()}".encode() + os.urandom(8)
+        ).hexdigest()[:16]
+
+        ha1 = digest(f"{self.username}:{realm}:{self.apikey}")
+        if session:
+            ha1 = digest(f"{ha1}:{nonce}:{cnonce}")
+        ha2 = digest(f"{method}:{path}")
+        if qop:
+            response = digest(f"{ha1}:{nonce}:{ncvalue}:{cnonce}:auth:{ha2}")
+        else:
+            response = digest(f"{ha1}:{nonce}:{ha2}")
+
+        value = (
+            f'username="{self.username}", realm="{realm}", nonce="{nonce}", '
+            f'uri="{path}", response="{response}"'
+        )
+        if opaque:
+            value += f', opaque="{opaque}"'
+        value += f', algorithm="{algorithm}"'
+        if qop:
+            value += f', qop="auth", nc={ncvalue}, cnonce="{cnonce}"'
+        return "Digest " + value
+
+
+class AsyncClient:
+    """Shared aiohttp session with per-host semaphores and digest state."""
+
+    def __init__(self, host_concurrency: Optional[int] = None):
+        self.host_concurrency = host_concurrency or get_host_concurrency()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._digest: dict[tuple, _DigestState] = {}
+
+    async def __aenter__(self) -> "AsyncClient":
+        connector = aiohttp.TCPConnector(limit_per_host=self.host_concurrency)
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.host_concurrency)
+        return self._semaphores[host]
+
+    async def _send(
+        self,
+        state: "_DigestState",
+        method: str,
+        url: str,
+        headers: dict,
+        data: Optional[str],
+        verify_ssl: bool,
+        timeout: int,
+    ) -> tuple:
+        for _attempt in range(2):
+            request_headers = dict(headers)
+            authorization = state.header(method, url)
+            if authorization:
+                request_headers["Authorization"] = authorization
+            async with self._session.request(
+                method,
+                url,
+                headers=request_headers,
+                data=data,
+                ssl=bool(verify_ssl),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as resp:
+                body = await resp.read()
+                if resp.status == 401 and state.update(
+                    resp.headers.get("WWW-Authenticate", "")
+                ):
+                    # New or stale nonce, retry once with the fresh challenge
+                    continue
+                break
+        return resp.status, resp.reason or "", resp.headers, body
+
+    async def _send_once(
+        self,
+        state: "_DigestState",
+        method: str,
+        url: str,
+        headers: dict,
+        data: Optional[str],
+        verify_ssl: bool,
+        timeout: int,
+    ) -> tuple:
+        async with self._semaphore(_host_key(url)):
+            if not state.primed:
+                # Let a single request answer the first challenge for this host
+                async with state.lock:
+                    if not state.primed:
+                        result = await self._send(
+                            state, method, url, headers, data, verify_ssl, timeout
+                        )
+                        state.primed = True
+                        return result
+            return await self._send(
+                state, method, url, headers, data, verify_ssl, timeout
+            )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        username: str,
+        apikey: str,
+        verify_ssl: bool = True,
+        headers: Optional[dict] = None,
+        data: Optional[str] = None,
+        timeout: int = 30,
+        params: Optional[dict] = None,
+    ) -> AsyncResponse:
+        """Make a digest authenticated request, answering the 401 challenge only when needed.
+
+        Follows the same request budget and retry policy as the sync engine,
+        and like it a POST drops the cached listings of its endpoint.
+        """
+        if headers is None:
+            headers = DEFAULT_HEADERS
+        method = method.upper()
+        if params:
+            url += ("&" if "?" in url else "?") + urlencode(params)
+
+        cache = get_cache()
+        if method == "GET" or cache is None or not cache.cacheable(url):
+            return await self._request(
+                method, url, username, apikey, verify_ssl, headers, data, timeout
+            )
+        try:
+            return await self._request(
+                method, url, username, apikey, verify_ssl, headers, data, timeout
+            )
+        finally:
+            # The listing changed, or may have if the outcome is unknown
+            cache.invalidate(url)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        username: str,
+        apikey: str,
+        verify_ssl: bool,
+        headers: dict,
+        data: Optional[str],
+        timeout: int,
+    ) -> AsyncResponse:
+        host = _host_key(url)
+        state = self._digest.setdefault(
+            (host, username, apikey), _DigestState(username, apikey)
+        )
+
+        logger.debug("Making async %s request to: %s", method, url)
+        policy = get_policy()
+        bucket = get_bucket(host)
+        bytes_sent = len(data) if data else 0
+        attempt = 0
+        while True:
+            wait = bucket.reserve()
+            if wait > 0:
+                metrics.record_rate_limit_wait(wait)
+                await asyncio.sleep(wait)
+            started = time.perf_counter()
+            try:
+                status, reason, resp_headers, body = await self._send_once(
+                    state, method, url, headers, data, verify_ssl, timeout
+                )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                metrics.record_request(
+                    method, url, "error", time.perf_counter() - started, bytes_sent
+                )
+                # A create may have reached the server unless the connection was never made
+                retryable = method == "GET" or isinstance(
+                    e, aiohttp.ClientConnectorError
+                )
+                if not retryable or attempt >= policy.max_retries:
+                    record_failure(method, url, attempt + 1, error=str(e))
+                    raise
+                delay = policy.delay(attempt)
+                logger.debug(
+                    "%s %s failed (%s), retrying in %.1fs", method, url, e, delay
+                )
+            else:
+                metrics.record_request(
+                    method,
+                    url,
+                    status,
+                    time.perf_counter() - started,
+                    bytes_sent,
+                    len(body),
+                )
+                if status == 429:
+                    bucket.throttled()
+                elif status < 400:
+                    bucket.succeeded()
+                if not policy.should_retry(method, status, attempt):
+                    if status in RETRY_STATUSES and attempt > 0:
+                        record_failure(method, url, attempt + 1, status=status)
+                    break
+                delay = policy.delay(attempt, resp_headers.get("Retry-After"))
+                logger.debug(
+                    "%s %s returned %s, retrying in %.1fs", method, url, status, delay
+                )
+            metrics.record_retry(method, url, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+        response = AsyncResponse(method, url, status, reason, resp_headers, body)
+        logger.debug("Response status code: %s", response.status_code)
+        if method == "GET" and response.status_code != 200:
+            logger.error("Request failed with status %s", response.status_code)
+            logger.error("Response text: %s", DebugPayload(lambda: response.text))
+        return response
+
+    async def paginated(
+        self,
+        url: str,
+        username: str,
+        apikey: str,
+        verify_ssl: bool = True,
+        headers: Optional[dict] = None,
+        items_per_page: int = ITEMS_PER_PAGE,
+    ) -> list[Any]:
+        """Return every item of a list endpoint, fetching the pages after the first concurrently."""
+
+        async def page(page_num: int, page_size: int) -> Any:
+            response = await self.request(
+                "GET",
+                url,
+                username,
+                apikey,
+                verify_ssl,
+                headers=headers,
+                params={"pageNum": page_num, "itemsPerPage": page_size},
+            )
+            response.raise_for_status()
+            return response.json()
+
+        first = await page(1, items_per_page)
+        if isinstance(first, list):
+            return first
+
+        results = list(first.get("results", []))
+        total = first.get("totalCount")
+        if total is None:
+            page_num = 1
+            last = results
+            while len(last) == items_per_page:
+                page_num += 1
+                last = (await page(page_num, items_per_page)).get("results", [])
+                results.extend(last)
+            return results
+
+        page_size = items_per_page
+        if 0 < len(results) < items_per_page and len(results) < total:
+            page_size = len(results)
+        page_count = math.ceil(total / page_size) if page_size else 1
+        pages = await asyncio.gather(
+            *(page(n, page_size) for n in range(2, page_count + 1))
+        )
+        for data in pages:
+            results.extend(data.get("results", []))
+        return results
+
+
+async def map_ordered(
+    func: Callable[[T], Awaitable[Any]],
+    items: Iterable[T],
+    concurrency: int = 1,
+    on_result: Optional[Callable[[int, T, Any, Optional[BaseException]], None]] = None,
+) -> list[tuple[T, Any, Optional[BaseException]]]:
+    """Await func for every item, at most concurrency at a time, returning (item, result, error) in input order.
+
+    An exception raised for one item is returned as its error and does not
+    cancel the others; cancellation of the caller cancels every pending item.
+    on_result(index, item, result, error) is called as each item completes.
+    """
+    items = list(items)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def call(index: int, item: T) -> tuple[T, Any, Optional[BaseException]]:
+        async with semaphore:
+            try:
+                outcome = (item, await func(item), None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                outcome = (item, None, e)
+        if on_result is not None:
+            on_result(index, *outcome)
+        return outcome
+
+    return list(await asyncio.gather(*(call(i, item) for i, item in enumerate(items))))
+
+
+def run(main: Callable[["AsyncClient"], Awaitable[T]]) -> T:
+    """Run main(client) on a fresh event loop with a shared AsyncClient."""
+
+    async def runner() -> T:
+        async with AsyncClient() as client:
+            return await main(client)
+
+    return asyncio.run(runner())
+
+
+# ---------------------------------------------------------------------------
+# Ops Manager / Atlas operations
+# ---------------------------------------------------------------------------
+
+
+async def fetch_alert_configs(
+    client: AsyncClient,
+    host: str,
+    group: str,
+    username: str,
+    apikey: str,
+    verify_ssl=True,
+) -> dict:
+    url = host + "/api/public/v1.0/groups/" + group + "/alertConfigs"
+    results = await client.paginated(url, username, apikey, verify_ssl)
+    return {"results": results, "totalCount": len(results)}
+
+
+async def create_alert_config(
+    client: AsyncClient,
+    host: str,
+    group: str,
+    username: str,
+    apikey: str,
+    alert: dict,
+    verify_ssl=True,
+) -> AsyncResponse:
+    url = host + "/api/public/v1.0/groups/" + group + "/alertConfigs/"
+    return await client.request(
+        "POST",
+        url,
+        username,
+        apikey,
+        verify_ssl,
+        headers={"Content-Type": "application/json"},
+        data=json.dumps(alert),
+    )
+
+
+async def fetch_automation_config(
+    client: AsyncClient,
+    host: str,
+    group: str,
+    username: str,
+    apikey: str,
+    verify_ssl=True,
+    fields: Optional[Iterable[str]] = None,
+) -> dict:
+    url = host + "/api/public/v1.0/groups/" + group + "/automationConfig"
+    response = await client.request("GET", url, username, apikey, verify_ssl)
+    response.raise_for_status()
+    logger.debug("Fetched Automation Config for project %s", group)
+    if fields is None:
+        return response.json()
+    # The body is already read, but only the selected fields become objects
+    return select_fields(iter_decoded(response.iter_content(STREAM_CHUNK_SIZE)), fields)
+
+
+async def fetch_automation_version(
+    client: AsyncClient,
+    host: str,
+    group: str,
+    username: str,
+    apikey: str,
+    verify_ssl=True,
+) -> Optional[int]:
+    url = host + "/api/public/v1.0/groups/" + group + "/automationStatus"
+    response = await client.request("GET", url, username, apikey, verify_ssl)
+    if not response.ok:
+        return None
+    return response.json().get("goalVersion")
+
+
+async def create_atlas_custom_role(
+    client: AsyncClient,
+    atlasUrl: str,
+    groupId: str,
+    username: str,
+    apikey: str,
+    rolePayload: dict,
+) -> AsyncResponse:
+    url = atlasUrl + "/api/atlas/v2/groups/" + groupId + "/customDBRoles/roles"
+    logger.debug("Creating custom role: %s", rolePayload.get("roleName"))
+    return await client.request(
+        "POST",
+        url,
+        username,
+        apikey,
+        headers=ATLAS_POST_HEADERS,
+        data=json.dumps(rolePayload),
+    )
+
+
+async def create_atlas_database_user(
+    client: AsyncClient,
+    atlasUrl: str,
+    groupId: str,
+    username: str,
+    apikey: str,
+    userPayload: dict,
+) -> AsyncResponse:
+    url = atlasUrl + "/api/atlas/v2/groups/" + groupId + "/databaseUsers"
+    logger.debug("Creating database user: %s", userPayload.get("username"))
+    return await client.request(
+        "POST",
+        url,
+        username,
+        apikey,
+        headers=ATLAS_POST_HEADERS,
+        data=json.dumps(userPayload),
+    )
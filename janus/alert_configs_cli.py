@@ -1,17 +1,37 @@
-import copy
+import hashlib
 import json
+from typing import Optional
 
 import questionary
 import requests
 import typer
-from requests.auth import HTTPDigestAuth
 from typer_config import use_yaml_config
 
-from janus.logging import logger
-from janus.projects import fetch_projects
+from janus.common import get_verify_ssl_config, load_config_file
+from janus.engine import map_with_engine
+from janus.executor import DEFAULT_CONCURRENCY, map_ordered
+from janus.exports import ExportFormat, ExportWriter, read_export
+from janus.journal import ImportJournal, default_journal_path
+from janus.logging import DebugPayload, debug_payload, logger
+from janus.mapping import SKIP, ProjectMapper, project_map_callback, select_projects
+from janus.pagination import iter_paginated
+from janus.plan import (
+    AUTO_PROJECT_MAP,
+    log_plan,
+    new_plan,
+    read_plan,
+    skip_project,
+    write_plan,
+)
+from janus.projects import fetch_projects, make_digest_request
 
 app = typer.Typer(help="Import/Export Alert Configs")
 
+# Fields generated by the server, removed before (re)creating an Alert Config
+VOLATILE_ALERT_CONFIG_FIELDS = frozenset(
+    ["links", "id", "created", "updated", "groupId"]
+)
+
 
 @app.command()
 @use_yaml_config()  # TODO find a way to not load this if running with --help
@@ -30,9 +50,35 @@ def export(
     outputFile: str = typer.Option(
         ..., "--outputFile", help="Output file (can be used in import process)"
     ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of projects to export in parallel",
+    ),
+    outputFormat: ExportFormat = typer.Option(
+        ExportFormat.ndjson,
+        "--outputFormat",
+        help="ndjson writes one record per project as it is exported, json writes a single pretty-printed array, archive writes gzip compressed ndjson storing each distinct Alert Config once",
+    ),
+    allProjects: bool = typer.Option(
+        False,
+        "--allProjects",
+        help="Export every project without prompting",
+    ),
+    include: Optional[list[str]] = typer.Option(
+        None,
+        "--include",
+        help="Only export projects whose name or id matches this wildcard pattern, without prompting (repeatable)",
+    ),
+    exclude: Optional[list[str]] = typer.Option(
+        None,
+        "--exclude",
+        help="Do not export projects whose name or id matches this wildcard pattern, without prompting (repeatable)",
+    ),
 ) -> None:
     """Export Alert Configs to the specified output file using an Organization Key. The process will first obtain all the Projects in the Organization and provide the user a choice of which Project to export the Alert Configs from."""
-    source_verify_ssl = config.get("source", {}).get("verify_ssl", True)
+    source_verify_ssl = get_verify_ssl_config(load_config_file(), "source")
     projects = fetch_projects(
         sourceUrl, sourceUsername, sourceApiKey, source_verify_ssl
     )
@@ -50,11 +96,16 @@ def export(
         )
         projectIdNameDict[project["id"]] = project["name"]
 
-    answer = questionary.checkbox(
-        "Select projects to export Alert Configs from", choices=choices
-    ).ask()
+    if allProjects or include or exclude:
+        answer = select_projects(projects["results"], include, exclude)
+        logger.info(
+            "Exporting %d of %d project(s)", len(answer), len(projects["results"])
+        )
+    else:
+        answer = questionary.checkbox(
+            "Select projects to export Alert Configs from", choices=choices
+        ).ask()
 
-    source_verify_ssl = config.get("source", {}).get("verify_ssl", True)
     export_alert_configs(
         sourceUrl,
         answer,
@@ -63,6 +114,8 @@ def export(
         sourceApiKey,
         outputFile,
         source_verify_ssl,
+        concurrency,
+        outputFormat,
     )
 
 
@@ -88,46 +141,203 @@ def import_(
         "--detectAndSkipDuplicates",
         help="Detect already existing Alert Configs created on the destination project i.e. avoid creation of duplicate Alert Configs",
     ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume an interrupted import, skipping the projects and Alert Configs recorded in the journal",
+    ),
+    journalFile: str = typer.Option(
+        None,
+        "--journalFile",
+        help="Journal of completed operations (default: <inputFile>.journal)",
+    ),
+    projectMap: Optional[str] = typer.Option(
+        None,
+        "--projectMap",
+        callback=project_map_callback,
+        help="YAML/JSON file mapping source projects to destination projects (id, name, auto or skip), so no prompt is needed",
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of Alert Configs to create in parallel",
+    ),
 ) -> None:
     """Import Alert Configs from the specified input file. The process will first obtain all the Projects in the destination Organization on the Destination Ops Manager and using this information, will allow the user to import Alert Configs into the same project (if it exists) or a different one"""
+    dest_verify_ssl = get_verify_ssl_config(load_config_file(), "destination")
     import_alert_configs(
         inputFile,
         destinationUrl,
         destinationUsername,
         destinationApiKey,
         detectAndSkipDuplicates,
+        verify_ssl=dest_verify_ssl,
+        resume=resume,
+        journalFile=journalFile,
+        projectMap=projectMap,
+        concurrency=concurrency,
     )
 
 
-def fetch_alert_configs(host, group, username, apikey, verify_ssl=True):
-    response = requests.get(
-        host + "/api/public/v1.0/groups/" + group + "/alertConfigs",
-        auth=HTTPDigestAuth(username, apikey),
-        verify=verify_ssl,
+@app.command()
+@use_yaml_config()
+def plan(
+    destinationUrl: str = typer.Option(
+        ...,
+        "--destinationUrl",
+        help="Destination Ops Manager URL e.g. https://opsmanager.example.com",
+    ),
+    destinationUsername: str = typer.Option(
+        ..., "--destinationUsername", help="Destination Ops Manager Username"
+    ),
+    destinationApiKey: str = typer.Option(
+        ..., "--destinationApiKey", help="Destination Ops Manager API Key"
+    ),
+    inputFile: str = typer.Option(
+        ..., "--inputFile", help="Input file generated from the export process"
+    ),
+    planFile: str = typer.Option(
+        "alert-configs.plan.json", "--planFile", help="JSON file to write the plan to"
+    ),
+    detectAndSkipDuplicates: bool = typer.Option(
+        True,
+        "--detectAndSkipDuplicates",
+        help="Detect already existing Alert Configs created on the destination project i.e. avoid creation of duplicate Alert Configs",
+    ),
+    projectMap: Optional[str] = typer.Option(
+        None,
+        "--projectMap",
+        callback=project_map_callback,
+        help="YAML/JSON file mapping source projects to destination projects (id, name, auto or skip); without it every project is mapped with auto",
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of destination projects to read in parallel",
+    ),
+) -> None:
+    """Plan the import of Alert Configs without changing anything. Writes what apply will create and skip and the estimated API calls to a plan file."""
+    dest_verify_ssl = get_verify_ssl_config(load_config_file(), "destination")
+    plan_alert_configs(
+        inputFile,
+        destinationUrl,
+        destinationUsername,
+        destinationApiKey,
+        planFile,
+        detectAndSkipDuplicates,
+        verify_ssl=dest_verify_ssl,
+        projectMap=projectMap,
+        concurrency=concurrency,
+    )
+
+
+@app.command()
+@use_yaml_config()
+def apply(
+    destinationUrl: str = typer.Option(
+        ...,
+        "--destinationUrl",
+        help="Destination Ops Manager URL e.g. https://opsmanager.example.com",
+    ),
+    destinationUsername: str = typer.Option(
+        ..., "--destinationUsername", help="Destination Ops Manager Username"
+    ),
+    destinationApiKey: str = typer.Option(
+        ..., "--destinationApiKey", help="Destination Ops Manager API Key"
+    ),
+    planFile: str = typer.Option(
+        "alert-configs.plan.json",
+        "--planFile",
+        help="Plan file written by the plan command",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume an interrupted apply, skipping the projects and Alert Configs recorded in the journal",
+    ),
+    journalFile: str = typer.Option(
+        None,
+        "--journalFile",
+        help="Journal of completed operations (default: <planFile>.journal)",
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of Alert Configs to create in parallel",
+    ),
+) -> None:
+    """Apply a plan made by the plan command: create its Alert Configs in the destination projects."""
+    dest_verify_ssl = get_verify_ssl_config(load_config_file(), "destination")
+    apply_alert_configs_plan(
+        planFile,
+        destinationUrl,
+        destinationUsername,
+        destinationApiKey,
+        verify_ssl=dest_verify_ssl,
+        resume=resume,
+        journalFile=journalFile,
+        concurrency=concurrency,
     )
-    response.raise_for_status()
-    alert_configs = response.json()
-    logger.debug("Fetched Alert Configs ...")
-    logger.debug(alert_configs)
+
+
+def fetch_alert_configs(host, group, username, apikey, verify_ssl=True):
+    url = host + "/api/public/v1.0/groups/" + group + "/alertConfigs"
+    results = list(iter_paginated(url, username, apikey, verify_ssl))
+    alert_configs = {"results": results, "totalCount": len(results)}
+    debug_payload("Fetched Alert Configs", alert_configs)
     return alert_configs
 
 
 def export_alert_configs(
-    host, groups, groupNameDict, username, apikey, outputFile, verify_ssl=True
+    host,
+    groups,
+    groupNameDict,
+    username,
+    apikey,
+    outputFile,
+    verify_ssl=True,
+    concurrency=1,
+    outputFormat=ExportFormat.ndjson,
 ):
-    output = []
-    for group in groups:
-        alert_configs = fetch_alert_configs(host, group, username, apikey, verify_ssl)
-        element = {
-            "project": {"id": group, "name": groupNameDict[group]},
-            "alertConfigs": [],
-        }
-        element["alertConfigs"] = alert_configs["results"]
-        output.append(element)
+    def fetch(group):
+        return fetch_alert_configs(host, group, username, apikey, verify_ssl)
 
-    json_object = json.dumps(output, indent=4)
-    with open(outputFile, "w") as outfile:
-        outfile.write(json_object)
+    async def fetch_async(client, group):
+        from janus import aio
+
+        return await aio.fetch_alert_configs(
+            client, host, group, username, apikey, verify_ssl
+        )
+
+    # Archives store each distinct Alert Config once, most projects share them
+    with ExportWriter(
+        outputFile,
+        "alertConfigs",
+        outputFormat,
+        {"source": host},
+        dedupe_field="alertConfigs",
+        dedupe_key=alert_config_blob,
+    ) as writer:
+        for group, alert_configs, error in map_with_engine(
+            fetch, fetch_async, groups, concurrency
+        ):
+            if error is not None:
+                logger.error(
+                    "Failed to export Alert Configs from project %s (%s): %s",
+                    groupNameDict[group],
+                    group,
+                    str(error),
+                )
+                continue
+            writer.write(
+                {
+                    "project": {"id": group, "name": groupNameDict[group]},
+                    "alertConfigs": alert_configs["results"],
+                }
+            )
 
 
 def import_alert_configs(
@@ -137,12 +347,14 @@ def import_alert_configs(
     destinationApikey,
     detectAndSkipDuplicates,
     continueOnError=True,
+    verify_ssl=True,
+    resume=False,
+    journalFile=None,
+    projectMap=None,
+    concurrency=DEFAULT_CONCURRENCY,
 ):
-    with open(inputFile, "r") as openfile:
-        import_data = json.load(openfile)
-
     destProjects = fetch_projects(
-        destinationUrl, destinationUsername, destinationApikey
+        destinationUrl, destinationUsername, destinationApikey, verify_ssl
     )
 
     choices = []
@@ -160,61 +372,303 @@ def import_alert_configs(
     skipChoice = questionary.Choice(title="Skip", value="Skip")
     choices.append(skipChoice)
 
-    for alert_config_import in import_data:
-        logger.info(
-            "Import Alert Configs for originally Project - %s (%s)",
-            alert_config_import["project"]["name"],
-            alert_config_import["project"]["id"],
-        )
-
-        if alert_config_import["project"]["id"] in destProjectIdNameDict:
-            # destination project exists
-            answer = questionary.select(
-                "Found destination Project with same Id. Importing Alert Configs into same project?",
-                instruction="Simply choose a different project",
-                choices=choices,
-                default=choicesDict[alert_config_import["project"]["id"]],
-            ).ask()
-        else:
-            answer = questionary.select(
-                "Destination Project with same Id not found. Select project to import Alert Configs to",
-                choices=choices,
-            ).ask()
+    mapper = None
+    if projectMap is not None:
+        try:
+            mapper = ProjectMapper(projectMap, destProjects["results"])
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--projectMap")
+
+    with ImportJournal(
+        journalFile or default_journal_path(inputFile), resume
+    ) as journal:
+        for alert_config_import in read_export(inputFile):
+            source_project_id = alert_config_import["project"]["id"]
+            if journal.is_project_complete(source_project_id):
+                logger.info(
+                    "Skipping already imported Alert Configs for originally Project - %s (%s)",
+                    alert_config_import["project"]["name"],
+                    source_project_id,
+                )
+                continue
 
-        if answer == "Skip":
             logger.info(
-                "Skipping import of Alert Configs for originally Project - %s (%s)",
+                "Import Alert Configs for originally Project - %s (%s)",
                 alert_config_import["project"]["name"],
-                alert_config_import["project"]["id"],
+                source_project_id,
+            )
+
+            # Resumed and mapped projects need no prompt
+            answer = journal.destination_for(source_project_id)
+            if answer is None and mapper is not None:
+                answer = mapper.resolve(alert_config_import["project"])
+            if answer is None and source_project_id in destProjectIdNameDict:
+                # destination project exists
+                answer = questionary.select(
+                    "Found destination Project with same Id. Importing Alert Configs into same project?",
+                    instruction="Simply choose a different project",
+                    choices=choices,
+                    default=choicesDict[source_project_id],
+                ).ask()
+            elif answer is None:
+                answer = questionary.select(
+                    "Destination Project with same Id not found. Select project to import Alert Configs to",
+                    choices=choices,
+                ).ask()
+
+            if answer == "Skip":
+                logger.info(
+                    "Skipping import of Alert Configs for originally Project - %s (%s)",
+                    alert_config_import["project"]["name"],
+                    source_project_id,
+                )
+                continue
+
+            journal.start_project(source_project_id, answer)
+            __post_alert_configs(
+                alert_config_import["alertConfigs"],
+                destinationUrl,
+                answer,
+                destinationUsername,
+                destinationApikey,
+                detectAndSkipDuplicates,
+                continueOnError,
+                verify_ssl,
+                journal,
+                concurrency,
+            )
+            journal.complete_project(source_project_id)
+
+
+def plan_alert_configs(
+    inputFile,
+    destinationUrl,
+    destinationUsername,
+    destinationApikey,
+    planFile,
+    detectAndSkipDuplicates=True,
+    verify_ssl=True,
+    projectMap=None,
+    concurrency=DEFAULT_CONCURRENCY,
+):
+    """Plan the import of an export file without changing anything.
+
+    The Alert Configs of every mapped destination project are read
+    concurrently, then each project is planned in file order: the Alert
+    Configs to create and, with detectAndSkipDuplicates, the duplicates of
+    configs already in the destination or planned for it by an earlier
+    project. Projects without a destination in projectMap (default: auto)
+    are left out of the plan, and so are projects whose destination's Alert
+    Configs could not be read.
+    """
+    destProjects = fetch_projects(
+        destinationUrl, destinationUsername, destinationApikey, verify_ssl
+    )
+    destProjectIdNameDict = {p["id"]: p["name"] for p in destProjects["results"]}
+    try:
+        mapper = ProjectMapper(projectMap or AUTO_PROJECT_MAP, destProjects["results"])
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--projectMap")
+
+    destinations = {
+        alert_config_import["project"]["id"]: mapper.resolve(
+            alert_config_import["project"]
+        )
+        for alert_config_import in read_export(inputFile)
+    }
+
+    # Fingerprints of the Alert Configs in each destination, and of those
+    # planned for it so far
+    fingerprints = {}
+    # Destinations whose Alert Configs could not be read: nothing is planned
+    # for them, since Alert Configs have no 409 to stop a duplicate
+    unreadable = {}
+    if detectAndSkipDuplicates:
+
+        def fetch(group):
+            results = fetch_alert_configs(
+                destinationUrl,
+                group,
+                destinationUsername,
+                destinationApikey,
+                verify_ssl,
+            )["results"]
+            return {alert_config_fingerprint(ac) for ac in results}
+
+        groups = sorted(
+            {d for d in destinations.values() if d is not None and d != SKIP}
+        )
+        for group, existing, error in map_ordered(fetch, groups, concurrency):
+            if error is not None:
+                logger.warning(
+                    "Could not fetch existing Alert Configs of project %s: %s",
+                    group,
+                    error,
+                )
+                unreadable[group] = str(error)
+                continue
+            fingerprints[group] = existing
+
+    plan = new_plan("alertConfigs", destinationUrl, inputFile)
+    totals = {"create": 0, "skip": 0, "conflict": 0}
+    api_calls = {"GET": 0, "POST": 0}
+    for alert_config_import in read_export(inputFile):
+        project = alert_config_import["project"]
+        destination_id = destinations[project["id"]]
+        if destination_id is None:
+            skip_project(plan, project, "no destination, map it in --projectMap")
+            continue
+        if destination_id == SKIP:
+            skip_project(plan, project, "skipped by the project map")
+            continue
+        if destination_id in unreadable:
+            skip_project(
+                plan,
+                project,
+                "existing Alert Configs of the destination could not be read, "
+                "plan again: %s" % unreadable[destination_id],
             )
             continue
 
-        __post_alert_configs(
-            alert_config_import["alertConfigs"],
-            destinationUrl,
-            answer,
-            destinationUsername,
-            destinationApikey,
-            detectAndSkipDuplicates,
-            continueOnError,
+        to_create = []
+        skipped = []
+        seen = fingerprints.get(destination_id)
+        for alert in __alert_configs_create_payload_from_export_payload(
+            alert_config_import["alertConfigs"]
+        ):
+            fingerprint = alert_config_fingerprint(alert)
+            if seen is not None and fingerprint in seen:
+                skipped.append(fingerprint)
+                continue
+            if seen is not None:
+                seen.add(fingerprint)
+            to_create.append(alert)
+
+        # Apply does not read the destination
+        project_calls = {"GET": 0, "POST": len(to_create)}
+        plan["projects"].append(
+            {
+                "source": {"id": project["id"], "name": project["name"]},
+                "destination": {
+                    "id": destination_id,
+                    "name": destProjectIdNameDict.get(destination_id, destination_id),
+                },
+                "alertConfigs": to_create,
+                "skipped": {"alertConfigs": skipped},
+                "conflicts": [],
+                "counts": {
+                    "alertConfigs": {
+                        "create": len(to_create),
+                        "skip": len(skipped),
+                        "conflict": 0,
+                    }
+                },
+                "apiCalls": project_calls,
+            }
         )
+        totals["create"] += len(to_create)
+        totals["skip"] += len(skipped)
+        for method, count in project_calls.items():
+            api_calls[method] += count
 
+    plan["summary"] = {"items": {"alertConfigs": totals}, "apiCalls": api_calls}
+    write_plan(planFile, plan)
+    log_plan(plan)
+    logger.info("  → Plan saved to: %s", planFile)
+    return plan
 
-def __alert_configs_create_payload_from_export_payload(alert_configs):
-    response = []
 
-    for alert in alert_configs:
-        new_alert = copy.deepcopy(alert)
+def apply_alert_configs_plan(
+    planFile,
+    destinationUrl,
+    destinationUsername,
+    destinationApikey,
+    continueOnError=True,
+    verify_ssl=True,
+    resume=False,
+    journalFile=None,
+    concurrency=DEFAULT_CONCURRENCY,
+):
+    """Create the Alert Configs of a plan, project by project, concurrency at a time.
+
+    Nothing is read from the destination first, the plan already holds only
+    the Alert Configs to create. The journal works as for import, so an
+    interrupted apply is resumed with resume=True.
+    """
+    try:
+        plan = read_plan(planFile, "alertConfigs", destinationUrl)
+    except (OSError, ValueError) as e:
+        raise typer.BadParameter(str(e), param_hint="--planFile")
+
+    log_plan(plan)
+    with ImportJournal(
+        journalFile or default_journal_path(planFile), resume
+    ) as journal:
+
+        def apply_project(entry):
+            source = entry["source"]
+            destination_id = entry["destination"]["id"]
+            journal.start_project(source["id"], destination_id)
+            __post_alert_configs(
+                entry["alertConfigs"],
+                destinationUrl,
+                destination_id,
+                destinationUsername,
+                destinationApikey,
+                False,
+                continueOnError,
+                verify_ssl,
+                journal,
+                concurrency,
+            )
+            journal.complete_project(source["id"])
+
+        entries = []
+        for entry in plan["projects"]:
+            if journal.is_project_complete(entry["source"]["id"]):
+                logger.info(
+                    "Skipping already applied Alert Configs for originally Project - %s (%s)",
+                    entry["source"]["name"],
+                    entry["source"]["id"],
+                )
+            else:
+                entries.append(entry)
+
+        # One project at a time, its Alert Configs concurrency at a time
+        for entry, _, error in map_ordered(apply_project, entries):
+            if error is not None:
+                logger.error(
+                    "Failed to apply Alert Configs for originally Project - %s (%s): %s",
+                    entry["source"]["name"],
+                    entry["source"]["id"],
+                    error,
+                )
 
-        del new_alert["links"]
-        del new_alert["id"]
-        del new_alert["created"]
-        del new_alert["updated"]
-        del new_alert["groupId"]
 
-        response.append(new_alert)
+def alert_config_fingerprint(alert):
+    """Return a content hash of an Alert Config that ignores server generated fields.
 
-    return response
+    Two Alert Configs with the same fingerprint are duplicates, whichever
+    project or Ops Manager instance they were read from.
+    """
+    return alert_config_blob(alert)[0]
+
+
+def alert_config_blob(alert):
+    """Return (fingerprint, payload) of an Alert Config, payload being the config without server generated fields."""
+    payload = alert_config_payload(alert)
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest(), payload
+
+
+def alert_config_payload(alert):
+    return {k: v for k, v in alert.items() if k not in VOLATILE_ALERT_CONFIG_FIELDS}
+
+
+def __alert_configs_create_payload_from_export_payload(alert_configs):
+    return [alert_config_payload(alert) for alert in alert_configs]
 
 
 def __post_alert_configs(
@@ -225,7 +679,15 @@ def __post_alert_configs(
     destinationApikey,
     skipDuplicates,
     continueOnError,
+    verify_ssl=True,
+    journal=None,
+    concurrency=1,
 ):
+    """Create the Alert Configs of one project, concurrency at a time on the selected engine.
+
+    Results are handled in the order of alert_configs, so the log and the
+    journal read as if the configs were created one by one.
+    """
     migrated_alerts = 0
     skipped_alerts = 0
     failed_migrations = 0
@@ -234,76 +696,149 @@ def __post_alert_configs(
         alert_configs
     )
 
+    # Journal keys include the position so identical configs are told apart
+    journal_keys = [
+        "%d:%s" % (i, alert_config_fingerprint(alert))
+        for i, alert in enumerate(alert_configs_to_import)
+    ]
+    if journal is not None:
+        pending = [
+            (alert, key)
+            for alert, key in zip(alert_configs_to_import, journal_keys)
+            if not journal.is_done("alertConfig", destinationGroupId, key)
+        ]
+        if len(pending) < len(alert_configs_to_import):
+            logger.info(
+                "Skipping %d Alert Configs already imported according to the journal",
+                len(alert_configs_to_import) - len(pending),
+            )
+            skipped_alerts += len(alert_configs_to_import) - len(pending)
+        if not pending:
+            return
+    else:
+        pending = list(zip(alert_configs_to_import, journal_keys))
+
+    current_fingerprints = set()
     if skipDuplicates:
-        dest_verify_ssl = config.get("destination", {}).get("verify_ssl", True)
         currentDestinationAlertConfigs = fetch_alert_configs(
             destinationUrl,
             destinationGroupId,
             destinationUsername,
             destinationApikey,
-            dest_verify_ssl,
-        )
-        current_alert_configs = __alert_configs_create_payload_from_export_payload(
-            currentDestinationAlertConfigs["results"]
+            verify_ssl,
         )
+        current_fingerprints = {
+            alert_config_fingerprint(ac)
+            for ac in currentDestinationAlertConfigs["results"]
+        }
+
+    # Duplicates are left out before anything is created, including copies of
+    # a config that is itself about to be created (kept: its first position)
+    to_create = []
+    batch_duplicates = {}
+    for alert, journal_key in pending:
+        if skipDuplicates:
+            fingerprint = alert_config_fingerprint(alert)
+            if fingerprint in current_fingerprints:
+                logger.debug("Found duplicate Alert Config %s", fingerprint)
+                skipped_alerts += 1
+                if journal is not None:
+                    journal.record("alertConfig", destinationGroupId, journal_key)
+                continue
+            if fingerprint in batch_duplicates:
+                batch_duplicates[fingerprint].append(journal_key)
+                continue
+            batch_duplicates[fingerprint] = []
+        to_create.append((alert, journal_key))
 
     logger.info(
         "Attempting to import %d Alert Configs to %s with Project Id %s",
-        len(alert_configs_to_import),
+        len(to_create),
         destinationUrl,
         destinationGroupId,
     )
-    for alert in alert_configs_to_import:
-        if skipDuplicates:
-            # first check for possible existance of rule
-            for ac in current_alert_configs:
-                if ac == alert:
-                    logger.debug("Found duplicate Alert Config")
-                    logger.debug("To Import : %s", alert)
-                    logger.debug("Existing  : %s", ac)
-                    break
-            else:
-                ac = None
-
-            if ac is not None:
-                skipped_alerts += 1
-                continue
+    url = (
+        destinationUrl
+        + "/api/public/v1.0/groups/"
+        + destinationGroupId
+        + "/alertConfigs/"
+    )
 
-        url = (
-            destinationUrl
-            + "/api/public/v1.0/groups/"
-            + destinationGroupId
-            + "/alertConfigs/"
-        )
-        headers = {"Content-Type": "application/json"}
-        logger.debug("===================================================")
-        logger.debug("Posting Request to create new Alert Config ...")
-        logger.debug("%s", json.dumps(alert))
-        logger.debug("---------------")
-
-        dest_verify_ssl = config.get("destination", {}).get("verify_ssl", True)
-        response = requests.post(
+    def create(item):
+        alert = item[0]
+        debug_payload("Posting Request to create new Alert Config", alert)
+        return make_digest_request(
+            "POST",
             url,
-            auth=HTTPDigestAuth(destinationUsername, destinationApikey),
+            destinationUsername,
+            destinationApikey,
+            verify_ssl,
+            headers={"Content-Type": "application/json"},
             data=json.dumps(alert),
-            headers=headers,
-            verify=dest_verify_ssl,
         )
-        logger.debug("Response ...")
-        logger.debug("%s", vars(response))
-        logger.debug("===================================================")
 
-        if continueOnError and (response.status_code != requests.codes.created):
+    async def create_async(client, item):
+        from janus import aio
+
+        alert = item[0]
+        debug_payload("Posting Request to create new Alert Config", alert)
+        return await aio.create_alert_config(
+            client,
+            destinationUrl,
+            destinationGroupId,
+            destinationUsername,
+            destinationApikey,
+            alert,
+            verify_ssl,
+        )
+
+    # Without continueOnError the first failure is raised only once every
+    # create already sent has been read, so those are journaled too
+    first_error = None
+    for (alert, journal_key), response, error in map_with_engine(
+        create, create_async, to_create, concurrency
+    ):
+        duplicates = (
+            batch_duplicates.pop(alert_config_fingerprint(alert), [])
+            if skipDuplicates
+            else []
+        )
+        if error is None:
+            debug_payload(
+                "Response",
+                lambda: {
+                    "status": response.status_code,
+                    "headers": dict(response.headers),
+                    "body": response.text,
+                },
+            )
+            if response.status_code == requests.codes.created or (
+                not continueOnError and response.ok
+            ):
+                migrated_alerts += 1
+                skipped_alerts += len(duplicates)
+                if journal is not None:
+                    journal.record("alertConfig", destinationGroupId, journal_key)
+                    for duplicate_key in duplicates:
+                        journal.record("alertConfig", destinationGroupId, duplicate_key)
+                continue
             logger.error(
                 "Unable to create new Alert Config - %s %s"
                 % (response.status_code, response.reason)
             )
-            print("Failed migration alert JSON:")
-            print(json.dumps(alert))
-            failed_migrations += 1
+            if first_error is None and not continueOnError:
+                try:
+                    response.raise_for_status()
+                except requests.exceptions.HTTPError as e:
+                    first_error = e
         else:
-            response.raise_for_status()
-            migrated_alerts += 1
+            logger.error("Unable to create new Alert Config - %s" % error)
+            if first_error is None and not continueOnError:
+                first_error = error
+        # Logged in full so the config can be created by hand
+        logger.error("Failed migration alert JSON: %s", DebugPayload(alert, limit=0))
+        # Copies of it are not journaled either, a resume retries them
+        failed_migrations += 1 + len(duplicates)
     logger.info(
         "Import Alert Configs to %s with Project Id %s Complete. Imported: %d, Skipped(duplicates): %d, Failed: %d"
         % (
@@ -314,6 +849,8 @@ def __post_alert_configs(
             failed_migrations,
         )
     )
+    if first_error is not None:
+        raise first_error
 
 
 ### TOOD
@@ -0,0 +1,196 @@
+"""On-disk cache for read-only API listings, selected with ``janus --cache-ttl``.
+
+Only the listings Janus reads to find projects and the current state of a
+destination are cached (see CACHEABLE_ENDPOINTS), so repeated import and
+migrate runs within a migration window do not download them again. An entry
+younger than the TTL is used as is; an older one is revalidated with
+If-None-Match/If-Modified-Since when the server sent an ETag or
+Last-Modified header. Any write to an endpoint drops the cached listings of
+that endpoint, for every credential.
+
+Entries live in one directory per (host, path), holding one file per
+credential, query and Accept header:
+
+    <cache dir>/<sha256(host, path)>/<sha256(credential, query, accept)>
+
+Each file is a JSON header line followed by the raw response body.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlencode, urlsplit
+
+from janus.logging import logger
+from janus.metrics import endpoint_of
+
+if TYPE_CHECKING:
+    from requests.models import Response
+
+DEFAULT_CACHE_DIR = ".janus-cache"
+
+# Listings that are safe to serve from the cache
+CACHEABLE_ENDPOINTS = frozenset(
+    [
+        "/api/public/v1.0/groups",
+        "/api/atlas/v2/groups/{groupId}/customDBRoles/roles",
+        "/api/atlas/v2/groups/{groupId}/databaseUsers",
+    ]
+)
+
+# Response headers kept with a cached body
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def credential_fingerprint(username: str, apikey: str) -> str:
+    """Short digest identifying a credential without storing it."""
+    return hashlib.sha256(f"{username}:{apikey}".encode("utf-8")).hexdigest()[:16]
+
+
+class CachedEntry:
+    """A cached response body with the headers needed to revalidate it."""
+
+    def __init__(self, path: str, meta: dict, body: bytes, age: float):
+        self.path = path
+        self.meta = meta
+        self.body = body
+        self.age = age
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        stored = self.meta["headers"]
+        if stored.get("ETag"):
+            headers["If-None-Match"] = stored["ETag"]
+        if stored.get("Last-Modified"):
+            headers["If-Modified-Since"] = stored["Last-Modified"]
+        return headers
+
+    def response(self) -> "Response":
+        """Rebuild the requests.Response the entry was stored from."""
+        # Imported here so enabling the cache in the CLI does not load requests
+        from requests.models import Response
+        from requests.structures import CaseInsensitiveDict
+
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = self.meta["url"]
+        response.headers = CaseInsensitiveDict(self.meta["headers"])
+        response.encoding = "utf-8"
+        response._content = self.body
+        return response
+
+
+class HttpCache:
+    """Directory of cached GET responses with a freshness TTL in seconds."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, ttl: float = 0):
+        self.directory = directory
+        self.ttl = ttl
+
+    def cacheable(self, url: str) -> bool:
+        return endpoint_of(url) in CACHEABLE_ENDPOINTS
+
+    def _endpoint_dir(self, url: str) -> str:
+        parts = urlsplit(url)
+        name = f"{parts.scheme}://{parts.netloc}{parts.path.rstrip('/')}"
+        return os.path.join(
+            self.directory, hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+        )
+
+    def _entry_path(
+        self,
+        url: str,
+        username: str,
+        apikey: str,
+        params: Optional[dict],
+        headers: Optional[dict],
+    ) -> str:
+        query = urlsplit(url).query
+        if params:
+            query += "&" + urlencode(sorted(params.items()))
+        accept = (headers or {}).get("Accept", "")
+        name = "\n".join([credential_fingerprint(username, apikey), query, accept])
+        return os.path.join(
+            self._endpoint_dir(url),
+            hashlib.sha256(name.encode("utf-8")).hexdigest()[:32],
+        )
+
+    def lookup(
+        self,
+        url: str,
+        username: str,
+        apikey: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> tuple[str, Optional[CachedEntry]]:
+        """Return the entry path for the request and its cached entry, if any."""
+        path = self._entry_path(url, username, apikey, params, headers)
+        try:
+            with open(path, "rb") as infile:
+                meta = json.loads(infile.readline())
+                body = infile.read()
+                age = time.time() - os.fstat(infile.fileno()).st_mtime
+        except (OSError, ValueError):
+            return path, None
+        return path, CachedEntry(path, meta, body, age)
+
+    def is_fresh(self, entry: CachedEntry) -> bool:
+        return entry.age < self.ttl
+
+    def store(self, path: str, response: "Response") -> None:
+        """Store a 200 response, replacing any previous entry atomically."""
+        meta = {
+            "url": response.url,
+            "headers": {
+                name: response.headers[name]
+                for name in STORED_HEADERS
+                if name in response.headers
+            },
+        }
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            # mkstemp creates the file readable by the current user only
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as outfile:
+                outfile.write(json.dumps(meta).encode("utf-8") + b"\n")
+                outfile.write(response.content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug("Could not cache %s: %s", response.url, e)
+
+    def touch(self, entry: CachedEntry) -> None:
+        """Mark a revalidated entry as fresh again."""
+        try:
+            os.utime(entry.path)
+        except OSError:
+            pass
+
+    def invalidate(self, url: str) -> None:
+        """Drop every cached listing of the endpoint of url."""
+        directory = self._endpoint_dir(url)
+        if os.path.isdir(directory):
+            logger.debug("Invalidating cached listings of %s", url)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_cache: Optional[HttpCache] = None
+
+
+def configure(ttl: float = 0, directory: str = DEFAULT_CACHE_DIR) -> None:
+    """Enable the cache for this run when ttl > 0, otherwise disable it."""
+    global _cache
+    _cache = HttpCache(directory, ttl) if ttl > 0 else None
+
+
+def get_cache() -> Optional[HttpCache]:
+    return _cache
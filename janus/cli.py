@@ -1,15 +1,86 @@
-from typing import Union
+import importlib
+from typing import Optional, Union
 
+import click
 import typer
+from typer.core import TyperGroup
 
-from janus import __app_name__, __version__, alert_configs_cli, db_users_cli
-from janus.logging import logger, setDebugLogLevel
+from janus import __app_name__, __version__, cache, metrics
+from janus.engine import Engine, set_engine
+from janus.logging import (
+    DEBUG_PAYLOAD_LIMIT,
+    configure_debug_payloads,
+    logger,
+    setDebugLogLevel,
+    setup_logging,
+)
+from janus.retry import (
+    DEFAULT_HOST_CONCURRENCY,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RATE_LIMIT,
+    configure,
+    get_request_failures,
+)
 
-app = typer.Typer()
 
-app = typer.Typer()
-app.add_typer(alert_configs_cli.app, name="alert-configs")
-app.add_typer(db_users_cli.app, name="db-users")
+class LazySubcommand(click.Command):
+    """Stand-in for a sub-app that is only imported when it is invoked.
+
+    Listing it in --help only needs its name and help text; the module, and
+    the dependencies it pulls in, are loaded by make_context when the
+    sub-app (or its own --help) is actually run.
+    """
+
+    def __init__(self, name: str, import_path: str, help: str):
+        super().__init__(name, help=help)
+        self.import_path = import_path
+        self._command: Optional[click.Command] = None
+
+    def load(self) -> click.Command:
+        if self._command is None:
+            module_name, attr = self.import_path.split(":")
+            sub_app = getattr(importlib.import_module(module_name), attr)
+            self._command = typer.main.get_group(sub_app)
+            self._command.name = self.name
+        return self._command
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        return self.load().make_context(info_name, args, parent=parent, **extra)
+
+
+class LazyGroup(TyperGroup):
+    """Top level group whose sub-apps are imported on first use."""
+
+    lazy_subcommands = {
+        "alert-configs": (
+            "janus.alert_configs_cli:app",
+            "Import/Export Alert Configs",
+        ),
+        "db-users": (
+            "janus.db_users_cli:app",
+            "Import/Export Database Users and Roles",
+        ),
+    }
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return super().list_commands(ctx) + list(self.lazy_subcommands)
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_subcommands:
+            import_path, help = self.lazy_subcommands[cmd_name]
+            return LazySubcommand(cmd_name, import_path, help)
+        return super().get_command(ctx, cmd_name)
+
+    def resolve_command(self, ctx: click.Context, args: list[str]):
+        cmd_name, cmd, cmd_args = super().resolve_command(ctx, args)
+        # Remembered for main(), the arguments are gone once it runs
+        ctx.meta["janus.help_requested"] = any(
+            arg in ctx.help_option_names for arg in cmd_args
+        )
+        return cmd_name, cmd, cmd_args
+
+
+app = typer.Typer(cls=LazyGroup)
 
 
 @app.command()
@@ -29,9 +100,47 @@ def _debug_logging_callback(value: bool) -> None:
         setDebugLogLevel()
 
 
+def _engine_callback(value: Engine) -> Engine:
+    if value == Engine.async_:
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            raise typer.BadParameter(
+                "The async engine requires aiohttp (pip install aiohttp)"
+            )
+    set_engine(value)
+    return value
+
+
+def _report_request_failures() -> None:
+    failures = get_request_failures()
+    if not failures:
+        return
+    logger.warning("")
+    logger.warning("⚠  %d request(s) still failing after retries:", len(failures))
+    for failure in failures:
+        logger.warning(
+            "  → %s %s (attempts: %d, status: %s, error: %s)",
+            failure["method"],
+            failure["url"],
+            failure["attempts"],
+            failure["status"],
+            failure["error"],
+        )
+
+
+def _report_metrics(metrics_file: Optional[str]) -> None:
+    for line in metrics.summary_lines():
+        logger.info(line)
+    if metrics_file:
+        metrics.write_metrics(metrics_file)
+        logger.info("Metrics written to %s", metrics_file)
+
+
 @app.callback()
 # @use_yaml_config(default_value="config.yaml")
 def main(
+    ctx: typer.Context,
     version: Union[bool, None] = typer.Option(
         None,
         "--version",
@@ -48,9 +157,93 @@ def main(
         is_eager=False,
         rich_help_panel="Customization and Utils",
     ),
+    engine: Engine = typer.Option(
+        Engine.sync,
+        "--engine",
+        help="Transport engine used for bulk API calls: 'sync' (requests, one thread per request) or 'async' (asyncio, many requests per thread)",
+        callback=_engine_callback,
+        rich_help_panel="Customization and Utils",
+    ),
+    max_retries: int = typer.Option(
+        DEFAULT_MAX_RETRIES,
+        "--max-retries",
+        min=0,
+        help="Retries for API calls failing with 429, transient 5xx or connection errors",
+        rich_help_panel="Customization and Utils",
+    ),
+    rate_limit: float = typer.Option(
+        DEFAULT_RATE_LIMIT,
+        "--rate-limit",
+        min=0,
+        help="Maximum API requests per second per host, shared by all workers (0 disables the limit)",
+        rich_help_panel="Customization and Utils",
+    ),
+    host_concurrency: int = typer.Option(
+        DEFAULT_HOST_CONCURRENCY,
+        "--host-concurrency",
+        min=1,
+        help="Maximum API requests in flight at once per host, shared by all workers",
+        rich_help_panel="Customization and Utils",
+    ),
+    debug_payload_limit: int = typer.Option(
+        DEBUG_PAYLOAD_LIMIT,
+        "--debug-payload-limit",
+        min=0,
+        help="Maximum characters of a request/response payload written to the debug log (0 for no limit)",
+        rich_help_panel="Customization and Utils",
+    ),
+    debug_sample_every: int = typer.Option(
+        1,
+        "--debug-sample-every",
+        min=1,
+        help="Only write one in N of the payloads logged for each kind of request to the debug log",
+        rich_help_panel="Customization and Utils",
+    ),
+    metrics_file: Optional[str] = typer.Option(
+        None,
+        "--metrics-file",
+        help="Write per endpoint latency, transfer and retry metrics to this file at the end of the run (Prometheus textfile format for .prom, JSON otherwise)",
+        rich_help_panel="Customization and Utils",
+    ),
+    cache_ttl: float = typer.Option(
+        0,
+        "--cache-ttl",
+        min=0,
+        help="Reuse project and destination user/role listings fetched in the last N seconds, stored on disk (0 disables the cache)",
+        rich_help_panel="Customization and Utils",
+    ),
+    cache_dir: str = typer.Option(
+        cache.DEFAULT_CACHE_DIR,
+        "--cache-dir",
+        help="Directory of the listing cache",
+        rich_help_panel="Customization and Utils",
+    ),
+    clear_cache: bool = typer.Option(
+        False,
+        "--clear-cache",
+        help="Drop every cached listing before running",
+        rich_help_panel="Customization and Utils",
+    ),
 ):
+    # Nothing to log for version or help output
+    if ctx.invoked_subcommand == "version" or ctx.meta.get("janus.help_requested"):
+        return
+    setup_logging()
     logger.debug("Starting janus ...")
     logger.debug("[DEBUG LOGGING ENABLED]")
+    configure(
+        max_retries=max_retries,
+        rate_limit=rate_limit,
+        host_concurrency=host_concurrency,
+    )
+    configure_debug_payloads(debug_payload_limit, debug_sample_every)
+    cache.configure(ttl=cache_ttl, directory=cache_dir)
+    if clear_cache:
+        cache.HttpCache(cache_dir).clear()
+    metrics.reset()
+    # Close callbacks run last in, first out: failures are reported last
+    ctx.call_on_close(lambda: _report_metrics(metrics_file))
+    ctx.call_on_close(_report_request_failures)
 
 
 ### TOOD
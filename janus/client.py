@@ -0,0 +1,255 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPDigestAuth
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout
+from requests.sessions import Session
+from urllib3.exceptions import NewConnectionError
+
+from janus import metrics
+from janus.cache import get_cache
+from janus.logging import DebugPayload, logger
+from janus.retry import (
+    DEFAULT_HOST_CONCURRENCY,
+    RETRY_STATUSES,
+    get_bucket,
+    get_host_concurrency,
+    get_host_slots,
+    get_policy,
+    record_failure,
+)
+
+DEFAULT_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+
+# Number of keep-alive connections kept open per host by default
+POOL_MAXSIZE = DEFAULT_HOST_CONCURRENCY
+
+_sessions: dict[tuple, Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str, username: str, apikey: str, verify_ssl=True) -> Session:
+    """Return the shared Session for the host of url and the given credentials.
+
+    Sessions are created once per (host, credentials, verify_ssl) and reused for
+    the rest of the run so that connections are kept alive and the digest nonce
+    obtained on the first 401 challenge is reused (with an incrementing nc) on
+    every following request instead of being renegotiated.
+    """
+    key = (_host_key(url), username, apikey, verify_ssl)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            logger.debug("Creating HTTP session for %s", key[0])
+            session = Session()
+            session.auth = HTTPDigestAuth(username, apikey)
+            session.verify = verify_ssl
+            # One pooled connection per request allowed in flight to the host
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=get_host_concurrency()
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+    return session
+
+
+def close_sessions() -> None:
+    """Close every pooled session and release their connections."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def make_digest_request(
+    method,
+    url,
+    username,
+    apikey,
+    verify_ssl=True,
+    headers=None,
+    data=None,
+    timeout=30,
+    params=None,
+    stream=False,
+):
+    """Make an authenticated request to Ops Manager/Atlas using the pooled session for the host.
+
+    Requests are paced by the shared budget of the host and retried with
+    backoff on 429, transient 5xx and connection errors. When the cache is
+    enabled, cacheable listings are served from it or revalidated, and a
+    POST drops the cached listings of its endpoint. With stream=True the
+    body of a successful response is left to be read with iter_content
+    (cached listings are always read in full).
+    """
+    if headers is None:
+        headers = DEFAULT_HEADERS
+
+    method = method.upper()
+    if method not in ("GET", "POST"):
+        raise ValueError(f"Unsupported HTTP method: {method}")
+
+    cache = get_cache()
+    if cache is None or not cache.cacheable(url):
+        return _send(
+            method,
+            url,
+            username,
+            apikey,
+            verify_ssl,
+            headers,
+            data,
+            timeout,
+            params,
+            stream,
+        )
+    if method == "GET":
+        return _cached_get(
+            cache, url, username, apikey, verify_ssl, headers, timeout, params
+        )
+    try:
+        return _send(
+            method, url, username, apikey, verify_ssl, headers, data, timeout, params
+        )
+    finally:
+        # The listing changed, or may have if the outcome is unknown
+        cache.invalidate(url)
+
+
+def _cached_get(cache, url, username, apikey, verify_ssl, headers, timeout, params):
+    path, entry = cache.lookup(url, username, apikey, params, headers)
+    if entry is not None and cache.is_fresh(entry):
+        logger.debug("Using cached response for %s (%.0fs old)", url, entry.age)
+        return entry.response()
+    if entry is not None and entry.validators():
+        headers = {**headers, **entry.validators()}
+    response = _send(
+        "GET", url, username, apikey, verify_ssl, headers, None, timeout, params
+    )
+    if response.status_code == 304 and entry is not None:
+        logger.debug("Cached response for %s is still valid", url)
+        cache.touch(entry)
+        return entry.response()
+    if response.status_code == 200:
+        cache.store(path, response)
+    return response
+
+
+def _never_sent(error):
+    """Whether a failed request never reached the server: the connection
+    timed out or was refused before anything was sent."""
+    if isinstance(error, ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the cause
+    cause = error.args[0] if error.args else None
+    return isinstance(cause, NewConnectionError) or isinstance(
+        getattr(cause, "reason", None), NewConnectionError
+    )
+
+
+def _send(
+    method,
+    url,
+    username,
+    apikey,
+    verify_ssl,
+    headers,
+    data,
+    timeout,
+    params,
+    stream=False,
+):
+    logger.debug("Making %s request to: %s", method, url)
+
+    session = get_session(url, username, apikey, verify_ssl)
+    policy = get_policy()
+    bucket = get_bucket(_host_key(url))
+    slots = get_host_slots(_host_key(url))
+    bytes_sent = len(data) if data else 0
+    attempt = 0
+    while True:
+        wait = bucket.reserve()
+        if wait > 0:
+            metrics.record_rate_limit_wait(wait)
+            time.sleep(wait)
+        try:
+            with slots:
+                started = time.perf_counter()
+                response = session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    data=data,
+                    params=params,
+                    timeout=timeout,
+                    stream=stream,
+                )
+        except (ConnectionError, Timeout) as e:
+            metrics.record_request(
+                method, url, "error", time.perf_counter() - started, bytes_sent
+            )
+            # A create may have reached the server unless the connection was never made
+            retryable = method == "GET" or _never_sent(e)
+            if not retryable or attempt >= policy.max_retries:
+                record_failure(method, url, attempt + 1, error=str(e))
+                raise
+            delay = policy.delay(attempt)
+            logger.debug("%s %s failed (%s), retrying in %.1fs", method, url, e, delay)
+        else:
+            metrics.record_request(
+                method,
+                url,
+                response.status_code,
+                time.perf_counter() - started,
+                bytes_sent,
+                # A streamed body is not read yet, count what the server announced
+                (
+                    int(response.headers.get("Content-Length", 0))
+                    if stream
+                    else len(response.content)
+                ),
+            )
+            if response.status_code == 429:
+                bucket.throttled()
+            elif response.status_code < 400:
+                bucket.succeeded()
+            if not policy.should_retry(method, response.status_code, attempt):
+                if response.status_code in RETRY_STATUSES and attempt > 0:
+                    record_failure(
+                        method, url, attempt + 1, status=response.status_code
+                    )
+                break
+            delay = policy.delay(attempt, response.headers.get("Retry-After"))
+            logger.debug(
+                "%s %s returned %s, retrying in %.1fs",
+                method,
+                url,
+                response.status_code,
+                delay,
+            )
+            # Give the connection of an unread streamed body back to the pool
+            response.close()
+        metrics.record_retry(method, url, delay)
+        attempt += 1
+        time.sleep(delay)
+
+    logger.debug("Response status code: %s", response.status_code)
+
+    # 304 answers a revalidation of a cached listing
+    if method == "GET" and response.status_code not in (200, 304):
+        logger.error("Request failed with status %s", response.status_code)
+        logger.error("Response text: %s", DebugPayload(lambda: response.text))
+
+    return response
@@ -1,8 +1,35 @@
 import typer
+import yaml
 from click.core import ParameterSource
 from click.types import BOOL
 from rich.prompt import Prompt
 
+from janus.logging import logger
+
+
+def load_config_file() -> dict:
+    """Load config from config.yaml file as fallback for PyInstaller builds."""
+    try:
+        with open("config.yaml", "r") as file:
+            return yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        logger.warning("No config.yaml file found, using defaults")
+        return {}
+    except Exception as e:
+        logger.warning(f"Failed to load config.yaml: {e}, using defaults")
+        return {}
+
+
+def get_verify_ssl_config(config: dict, key: str = "source") -> bool:
+    """Get verify_ssl config from either nested or root level configuration."""
+    # First try nested format: config["source"]["verify_ssl"]
+    nested_config = config.get(key, {})
+    if isinstance(nested_config, dict) and "verify_ssl" in nested_config:
+        return nested_config["verify_ssl"]
+
+    # Fall back to root level: config["verify_ssl"]
+    return config.get("verify_ssl", True)
+
 
 def confirm_option_callback(ctx: typer.Context, param: typer.CallbackParam, value):
     # Only prompt if the value came from DEFAULT_MAP (config file) AND it's not a required value
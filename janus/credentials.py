@@ -0,0 +1,108 @@
+import csv
+import os
+import threading
+from typing import Any, Callable, Optional, TextIO
+
+from janus.logging import logger
+
+PASSWORD_CSV_HEADER = [
+    "timestamp",
+    "source_project",
+    "source_project_id",
+    "destination_project",
+    "destination_project_id",
+    "username",
+    "auth_database",
+    "password",
+    "roles",
+]
+
+# Rows written between two fsyncs, when no project boundary comes first
+SYNC_EVERY = 500
+
+
+class CredentialSink:
+    """Password CSV written row by row, readable by the owner only.
+
+    Each row is flushed as it is written and synced to disk every
+    sync_every rows and whenever sync() is called, so memory does not grow
+    with the number of users, a crash of Janus loses no row and a crash of
+    the machine at most the rows not yet synced. The on_synced callback of
+    a row runs once the row is on disk, e.g. to journal its user. With
+    append=True an existing file is extended instead of replaced, for
+    resumed imports. Rows may be written from several threads.
+    """
+
+    def __init__(self, path: str, append: bool = False, sync_every: int = SYNC_EVERY):
+        self.path = path
+        self.append = append
+        self.sync_every = sync_every
+        self._unsynced: list[Optional[Callable[[], None]]] = []
+        self._file: Optional[TextIO] = None
+        self._writer: Any = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "CredentialSink":
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if self.append else os.O_TRUNC)
+        fd = os.open(self.path, flags, 0o600)
+        # The mode only applies to new files, tighten an existing one too
+        try:
+            os.fchmod(fd, 0o600)
+        except OSError as e:
+            logger.warning("Could not restrict permissions of %s: %s", self.path, e)
+        self._file = os.fdopen(fd, "a" if self.append else "w", newline="")
+        self._writer = csv.writer(self._file)
+        if os.fstat(fd).st_size == 0:
+            self._writer.writerow(PASSWORD_CSV_HEADER)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.sync()
+        self._file.close()
+        self._file = None
+
+    def write(
+        self,
+        timestamp: str,
+        source_project: dict[str, Any],
+        destination_project_name: str,
+        destination_project_id: str,
+        credentials: dict[str, Any],
+        on_synced: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Append the password row of one created user."""
+        roles = ";".join(
+            f"{r['roleName']}@{r['databaseName']}" for r in credentials.get("roles", [])
+        )
+        with self._lock:
+            self._writer.writerow(
+                [
+                    timestamp,
+                    source_project["name"],
+                    source_project["id"],
+                    destination_project_name,
+                    destination_project_id,
+                    credentials["username"],
+                    credentials["databaseName"],
+                    credentials["password"],
+                    roles,
+                ]
+            )
+            # Handed to the OS at once, only the fsync is batched
+            self._file.flush()
+            self._unsynced.append(on_synced)
+            if len(self._unsynced) >= self.sync_every:
+                self._sync()
+
+    def sync(self) -> None:
+        """Flush and fsync the rows written so far, then run their on_synced."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            synced, self._unsynced = self._unsynced, []
+            for on_synced in synced:
+                if on_synced is not None:
+                    on_synced()
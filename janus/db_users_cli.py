@@ -1,45 +1,49 @@
-import csv
 import json
-import secrets
-import string
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Any, Union
+from typing import Any, Callable, Iterable, Optional
 
 import questionary
 import requests
 import typer
-import yaml
-from requests.auth import HTTPDigestAuth
 from typer_config import use_yaml_config
 
-from janus.logging import logger
-
-
-def load_config_file() -> dict:
-    """Load config from config.yaml file as fallback for PyInstaller builds."""
-    try:
-        with open("config.yaml", "r") as file:
-            return yaml.safe_load(file) or {}
-    except FileNotFoundError:
-        logger.warning("No config.yaml file found, using defaults")
-        return {}
-    except Exception as e:
-        logger.warning(f"Failed to load config.yaml: {e}, using defaults")
-        return {}
-
-
-def get_verify_ssl_config(config: dict, key: str = "source") -> bool:
-    """Get verify_ssl config from either nested or root level configuration."""
-    # First try nested format: config["source"]["verify_ssl"]
-    nested_config = config.get(key, {})
-    if isinstance(nested_config, dict) and "verify_ssl" in nested_config:
-        return nested_config["verify_ssl"]
-
-    # Fall back to root level: config["verify_ssl"]
-    return config.get("verify_ssl", True)
-
-
+from janus.common import get_verify_ssl_config, load_config_file
+from janus.credentials import CredentialSink
+from janus.engine import map_with_engine
+from janus.executor import DEFAULT_CONCURRENCY
+from janus.exports import ExportFormat, ExportWriter, read_export
+from janus.incremental import ExportState, content_hash, default_state_path
+from janus.journal import ImportJournal, default_journal_path
+from janus.jsonstream import STREAM_CHUNK_SIZE, iter_decoded, select_fields
+from janus.logging import debug_payload, logger
+from janus.mapping import (
+    SKIP,
+    ProjectMapper,
+    project_map_callback,
+    select_projects,
+)
+from janus.pagination import iter_paginated
+from janus.passwords import (
+    CHARACTER_CLASSES,
+    DEFAULT_POLICY,
+    PasswordGenerator,
+    PasswordPolicy,
+    policy_from_names,
+)
+from janus.plan import (
+    AUTO_PROJECT_MAP,
+    log_plan,
+    new_plan,
+    read_plan,
+    skip_project,
+    write_plan,
+)
 from janus.projects import fetch_projects, make_digest_request
+from janus.roles import BUILTIN_ROLES, plan_role_waves, role_dependencies
+from janus.snapshot import DestinationSnapshot
 
 # Type aliases for common data structures
 JsonDict = dict[str, Any]
@@ -47,6 +51,9 @@ RoleDict = dict[str, Any]
 UserDict = dict[str, Any]
 ProjectDict = dict[str, Any]
 
+# Parts of the automation config an export reads, the rest is never parsed
+AUTOMATION_CONFIG_FIELDS = ("version", "roles", "auth.usersWanted")
+
 app = typer.Typer(help="Import/Export Database Users and Roles")
 
 
@@ -73,6 +80,42 @@ def export(
         "--outputFile",
         help="Output file (can be used in import process)",
     ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of projects to export in parallel",
+    ),
+    outputFormat: ExportFormat = typer.Option(
+        ExportFormat.ndjson,
+        "--outputFormat",
+        help="ndjson writes one record per project as it is exported, json writes a single pretty-printed array, archive writes gzip compressed ndjson",
+    ),
+    allProjects: bool = typer.Option(
+        False,
+        "--allProjects",
+        help="Export every project without prompting",
+    ),
+    include: Optional[list[str]] = typer.Option(
+        None,
+        "--include",
+        help="Only export projects whose name or id matches this wildcard pattern, without prompting (repeatable)",
+    ),
+    exclude: Optional[list[str]] = typer.Option(
+        None,
+        "--exclude",
+        help="Do not export projects whose name or id matches this wildcard pattern, without prompting (repeatable)",
+    ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Only export the projects whose users or roles changed since the last incremental export, writing a delta file that import applies like a full export",
+    ),
+    stateFile: Optional[str] = typer.Option(
+        None,
+        "--stateFile",
+        help="Automation config version and content hash of every exported project, used by --incremental (default: <outputFile>.state)",
+    ),
 ) -> None:
     """Export Database Users and Custom Roles from Ops Manager/Cloud Manager to a JSON file."""
     try:
@@ -98,9 +141,15 @@ def export(
         )
         projectIdNameDict[project["id"]] = project["name"]
 
-    answer = questionary.checkbox(
-        "Select projects to export Database Users and Roles from", choices=choices
-    ).ask()
+    if allProjects or include or exclude:
+        answer = select_projects(projects["results"], include, exclude)
+        logger.info(
+            "Exporting %d of %d project(s)", len(answer), len(projects["results"])
+        )
+    else:
+        answer = questionary.checkbox(
+            "Select projects to export Database Users and Roles from", choices=choices
+        ).ask()
 
     export_db_users_and_roles(
         sourceUrl,
@@ -110,6 +159,9 @@ def export(
         sourceApiKey,
         outputFile,
         source_verify_ssl,
+        concurrency,
+        outputFormat,
+        (stateFile or default_state_path(outputFile)) if incremental else None,
     )
 
 
@@ -146,8 +198,50 @@ def import_(
         "--skipExisting",
         help="Skip existing users and roles to avoid duplicates",
     ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume an interrupted import, skipping the projects, roles and users recorded in the journal",
+    ),
+    journalFile: Optional[str] = typer.Option(
+        None,
+        "--journalFile",
+        help="Journal of completed operations (default: <passwordOutputFile>.journal)",
+    ),
+    projectMap: Optional[str] = typer.Option(
+        None,
+        "--projectMap",
+        callback=project_map_callback,
+        help="YAML/JSON file mapping source projects to destination projects (id, name, auto or skip), so no prompt is needed",
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of projects to import in parallel",
+    ),
+    passwordLength: int = typer.Option(
+        DEFAULT_POLICY.length,
+        "--passwordLength",
+        min=1,
+        help="Length of the generated passwords",
+    ),
+    passwordClasses: str = typer.Option(
+        ",".join(CHARACTER_CLASSES),
+        "--passwordClasses",
+        help="Comma separated character classes the generated passwords are drawn from: %s"
+        % ", ".join(CHARACTER_CLASSES),
+    ),
+    passwordRequiredClasses: Optional[str] = typer.Option(
+        None,
+        "--passwordRequiredClasses",
+        help="Comma separated character classes every generated password contains at least once (default: all of --passwordClasses)",
+    ),
 ) -> None:
     """Import Database Users and Custom Roles to Atlas. Generates random passwords for all users and exports them to a CSV file."""
+    password_policy = _password_policy(
+        passwordLength, passwordClasses, passwordRequiredClasses
+    )
     import_db_users_and_roles(
         inputFile,
         destinationUrl,
@@ -155,6 +249,143 @@ def import_(
         destinationApiKey,
         passwordOutputFile,
         skipExisting,
+        resume,
+        journalFile,
+        projectMap,
+        concurrency,
+        password_policy,
+    )
+
+
+@app.command()
+@use_yaml_config()
+def plan(
+    destinationUrl: str = typer.Option(
+        ...,
+        "--destinationUrl",
+        help="Destination Atlas URL e.g. https://cloud.mongodb.com",
+    ),
+    destinationUsername: str = typer.Option(
+        ...,
+        "--destinationUsername",
+        help="Destination Atlas Username",
+    ),
+    destinationApiKey: str = typer.Option(
+        ...,
+        "--destinationApiKey",
+        help="Destination Atlas API Key",
+    ),
+    inputFile: str = typer.Option(
+        ...,
+        "--inputFile",
+        help="Input file generated from the export process",
+    ),
+    planFile: str = typer.Option(
+        "db-users.plan.json",
+        "--planFile",
+        help="JSON file to write the plan to",
+    ),
+    projectMap: Optional[str] = typer.Option(
+        None,
+        "--projectMap",
+        callback=project_map_callback,
+        help="YAML/JSON file mapping source projects to destination projects (id, name, auto or skip); without it every project is mapped with auto",
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of destination projects to read in parallel",
+    ),
+) -> None:
+    """Plan the import of Database Users and Custom Roles to Atlas without changing anything. Writes what apply will create and skip, the conflicts found and the estimated API calls to a plan file."""
+    plan_db_users_and_roles(
+        inputFile,
+        destinationUrl,
+        destinationUsername,
+        destinationApiKey,
+        planFile,
+        projectMap,
+        concurrency,
+    )
+
+
+@app.command()
+@use_yaml_config()
+def apply(
+    destinationUrl: str = typer.Option(
+        ...,
+        "--destinationUrl",
+        help="Destination Atlas URL e.g. https://cloud.mongodb.com",
+    ),
+    destinationUsername: str = typer.Option(
+        ...,
+        "--destinationUsername",
+        help="Destination Atlas Username",
+    ),
+    destinationApiKey: str = typer.Option(
+        ...,
+        "--destinationApiKey",
+        help="Destination Atlas API Key",
+    ),
+    planFile: str = typer.Option(
+        "db-users.plan.json",
+        "--planFile",
+        help="Plan file written by the plan command",
+    ),
+    passwordOutputFile: str = typer.Option(
+        ...,
+        "--passwordOutputFile",
+        help="CSV file to export generated passwords",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume an interrupted apply, skipping the projects, roles and users recorded in the journal",
+    ),
+    journalFile: Optional[str] = typer.Option(
+        None,
+        "--journalFile",
+        help="Journal of completed operations (default: <passwordOutputFile>.journal)",
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of roles and users to create in parallel",
+    ),
+    passwordLength: int = typer.Option(
+        DEFAULT_POLICY.length,
+        "--passwordLength",
+        min=1,
+        help="Length of the generated passwords",
+    ),
+    passwordClasses: str = typer.Option(
+        ",".join(CHARACTER_CLASSES),
+        "--passwordClasses",
+        help="Comma separated character classes the generated passwords are drawn from: %s"
+        % ", ".join(CHARACTER_CLASSES),
+    ),
+    passwordRequiredClasses: Optional[str] = typer.Option(
+        None,
+        "--passwordRequiredClasses",
+        help="Comma separated character classes every generated password contains at least once (default: all of --passwordClasses)",
+    ),
+) -> None:
+    """Apply a plan made by the plan command: create its Custom Roles and Database Users in Atlas. Generates random passwords for all users and exports them to a CSV file."""
+    password_policy = _password_policy(
+        passwordLength, passwordClasses, passwordRequiredClasses
+    )
+    apply_db_users_plan(
+        planFile,
+        destinationUrl,
+        destinationUsername,
+        destinationApiKey,
+        passwordOutputFile,
+        resume,
+        journalFile,
+        concurrency,
+        password_policy,
     )
 
 
@@ -206,8 +437,81 @@ def migrate(
         "--skipExisting",
         help="Skip existing users and roles to avoid duplicates",
     ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume an interrupted import, skipping the projects, roles and users recorded in the journal",
+    ),
+    journalFile: Optional[str] = typer.Option(
+        None,
+        "--journalFile",
+        help="Journal of completed operations (default: <passwordOutputFile>.journal)",
+    ),
+    projectMap: Optional[str] = typer.Option(
+        None,
+        "--projectMap",
+        callback=project_map_callback,
+        help="YAML/JSON file mapping source projects to destination projects (id, name, auto or skip), so no prompt is needed",
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        min=1,
+        help="Number of projects to export and import in parallel",
+    ),
+    outputFormat: ExportFormat = typer.Option(
+        ExportFormat.ndjson,
+        "--outputFormat",
+        help="ndjson writes one record per project as it is exported, json writes a single pretty-printed array, archive writes gzip compressed ndjson",
+    ),
+    allProjects: bool = typer.Option(
+        False,
+        "--allProjects",
+        help="Export every project without prompting",
+    ),
+    include: Optional[list[str]] = typer.Option(
+        None,
+        "--include",
+        help="Only export projects whose name or id matches this wildcard pattern, without prompting (repeatable)",
+    ),
+    exclude: Optional[list[str]] = typer.Option(
+        None,
+        "--exclude",
+        help="Do not export projects whose name or id matches this wildcard pattern, without prompting (repeatable)",
+    ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Only export the projects whose users or roles changed since the last incremental export, writing a delta file that import applies like a full export",
+    ),
+    stateFile: Optional[str] = typer.Option(
+        None,
+        "--stateFile",
+        help="Automation config version and content hash of every exported project, used by --incremental (default: <outputFile>.state)",
+    ),
+    passwordLength: int = typer.Option(
+        DEFAULT_POLICY.length,
+        "--passwordLength",
+        min=1,
+        help="Length of the generated passwords",
+    ),
+    passwordClasses: str = typer.Option(
+        ",".join(CHARACTER_CLASSES),
+        "--passwordClasses",
+        help="Comma separated character classes the generated passwords are drawn from: %s"
+        % ", ".join(CHARACTER_CLASSES),
+    ),
+    passwordRequiredClasses: Optional[str] = typer.Option(
+        None,
+        "--passwordRequiredClasses",
+        help="Comma separated character classes every generated password contains at least once (default: all of --passwordClasses)",
+    ),
 ) -> None:
     """Export from Ops Manager/Cloud Manager and Import to Atlas in one step. Generates random passwords and exports them to CSV."""
+    # Checked before exporting, not after
+    password_policy = _password_policy(
+        passwordLength, passwordClasses, passwordRequiredClasses
+    )
 
     logger.info("")
     logger.info("=" * 80)
@@ -239,9 +543,15 @@ def migrate(
         )
         projectIdNameDict[project["id"]] = project["name"]
 
-    answer = questionary.checkbox(
-        "Select projects to export Database Users and Roles from", choices=choices
-    ).ask()
+    if allProjects or include or exclude:
+        answer = select_projects(projects["results"], include, exclude)
+        logger.info(
+            "Exporting %d of %d project(s)", len(answer), len(projects["results"])
+        )
+    else:
+        answer = questionary.checkbox(
+            "Select projects to export Database Users and Roles from", choices=choices
+        ).ask()
 
     export_db_users_and_roles(
         sourceUrl,
@@ -251,6 +561,9 @@ def migrate(
         sourceApiKey,
         outputFile,
         source_verify_ssl,
+        concurrency,
+        outputFormat,
+        (stateFile or default_state_path(outputFile)) if incremental else None,
     )
 
     logger.info("")
@@ -266,6 +579,11 @@ def migrate(
         destinationApiKey,
         passwordOutputFile,
         skipExisting,
+        resume,
+        journalFile,
+        projectMap,
+        concurrency,
+        password_policy,
     )
 
     logger.info("")
@@ -275,19 +593,63 @@ def migrate(
     logger.info("")
 
 
+def _password_policy(
+    length: int, classes: str, required: Optional[str]
+) -> PasswordPolicy:
+    """Build the password policy of the --password* options."""
+    try:
+        return policy_from_names(length, classes, required)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--passwordClasses")
+
+
 def fetch_automation_config(
-    host: str, group: str, username: str, apikey: str, verify_ssl: bool = True
+    host: str,
+    group: str,
+    username: str,
+    apikey: str,
+    verify_ssl: bool = True,
+    fields: Optional[Iterable[str]] = None,
 ) -> JsonDict:
-    """Fetch automation configuration from Ops Manager/Cloud Manager."""
+    """Fetch automation configuration from Ops Manager/Cloud Manager.
+
+    With fields (dotted key paths) the response is parsed as it streams in
+    and only those parts of the config are returned.
+    """
     url = host + "/api/public/v1.0/groups/" + group + "/automationConfig"
-    response = make_digest_request("GET", url, username, apikey, verify_ssl)
-    response.raise_for_status()
-    automation_config: JsonDict = response.json()
+    if fields is None:
+        response = make_digest_request("GET", url, username, apikey, verify_ssl)
+        response.raise_for_status()
+        automation_config: JsonDict = response.json()
+    else:
+        response = make_digest_request(
+            "GET", url, username, apikey, verify_ssl, stream=True
+        )
+        with response:
+            response.raise_for_status()
+            automation_config = select_fields(
+                iter_decoded(response.iter_content(STREAM_CHUNK_SIZE)), fields
+            )
     logger.debug("Fetched Automation Config for project %s", group)
-    logger.debug(json.dumps(automation_config, indent=2))
+    debug_payload("Automation Config", automation_config, indent=2)
     return automation_config
 
 
+def fetch_automation_version(
+    host: str, group: str, username: str, apikey: str, verify_ssl: bool = True
+) -> Optional[int]:
+    """Return the automation config version of a project from its automation status, or None if unavailable.
+
+    The status is far smaller than the automation config, so an unchanged
+    project costs one small request in an incremental export.
+    """
+    url = host + "/api/public/v1.0/groups/" + group + "/automationStatus"
+    response = make_digest_request("GET", url, username, apikey, verify_ssl)
+    if not response.ok:
+        return None
+    return response.json().get("goalVersion")
+
+
 def extract_custom_roles(automation_config: JsonDict) -> list[RoleDict]:
     """Extract custom roles from automation configuration."""
     custom_roles: list[RoleDict] = []
@@ -351,93 +713,119 @@ def export_db_users_and_roles(
     apikey: str,
     outputFile: str,
     verify_ssl: bool = True,
+    concurrency: int = 1,
+    outputFormat: ExportFormat = ExportFormat.ndjson,
+    stateFile: Optional[str] = None,
 ) -> None:
-    """Export database users and custom roles for selected projects."""
-    output: list[ProjectDict] = []
-
-    for group in groups:
+    """Export database users and custom roles for selected projects, writing each project as it completes.
+
+    With a stateFile only the projects that changed since the state was saved
+    are written, and projects whose automation config version did not change
+    are not fetched at all.
+    """
+    total_users = 0
+    total_roles = 0
+    unchanged = 0
+    state = ExportState(stateFile) if stateFile else None
+
+    def fetch(group: str) -> Optional[JsonDict]:
         logger.info(
             "Exporting Database Users and Roles from project: %s (%s)",
             groupNameDict[group],
             group,
         )
-
-        try:
-            automation_config = fetch_automation_config(
+        if state is not None and state.version_of(group) is not None:
+            version = fetch_automation_version(
                 host, group, username, apikey, verify_ssl
             )
+            if version == state.version_of(group):
+                return None
+        return fetch_automation_config(
+            host, group, username, apikey, verify_ssl, AUTOMATION_CONFIG_FIELDS
+        )
 
-            custom_roles = extract_custom_roles(automation_config)
-            database_users = extract_database_users(automation_config)
+    async def fetch_async(client: Any, group: str) -> Optional[JsonDict]:
+        from janus import aio
+
+        logger.info(
+            "Exporting Database Users and Roles from project: %s (%s)",
+            groupNameDict[group],
+            group,
+        )
+        if state is not None and state.version_of(group) is not None:
+            version = await aio.fetch_automation_version(
+                client, host, group, username, apikey, verify_ssl
+            )
+            if version == state.version_of(group):
+                return None
+        return await aio.fetch_automation_config(
+            client, host, group, username, apikey, verify_ssl, AUTOMATION_CONFIG_FIELDS
+        )
+
+    metadata: JsonDict = {"source": host}
+    if state is not None:
+        metadata["incremental"] = True
+    with ExportWriter(outputFile, "dbUsers", outputFormat, metadata) as writer:
+        for group, automation_config, error in map_with_engine(
+            fetch, fetch_async, groups, concurrency
+        ):
+            if isinstance(error, requests.exceptions.HTTPError):
+                logger.error(
+                    "Failed to fetch automation config for project %s: %s",
+                    group,
+                    str(error),
+                )
+                logger.error(
+                    "This may occur if the project doesn't have automation enabled"
+                )
+                continue
+            elif error is not None:
+                logger.error("Error exporting from project %s: %s", group, str(error))
+                continue
+            elif automation_config is None:
+                logger.debug("Automation config of project %s is unchanged", group)
+                unchanged += 1
+                continue
 
             element = {
                 "project": {"id": group, "name": groupNameDict[group]},
-                "customRoles": custom_roles,
-                "databaseUsers": database_users,
+                "customRoles": extract_custom_roles(automation_config),
+                "databaseUsers": extract_database_users(automation_config),
             }
-
-            output.append(element)
+            if state is not None:
+                digest = content_hash(element)
+                changed = not state.is_unchanged(group, digest)
+                state.update(group, automation_config.get("version"), digest)
+                if not changed:
+                    logger.debug("Users and roles of project %s are unchanged", group)
+                    unchanged += 1
+                    continue
+            writer.write(element)
+            total_roles += len(element["customRoles"])
+            total_users += len(element["databaseUsers"])
             logger.info(
                 "Exported %d custom roles and %d database users from project %s",
-                len(custom_roles),
-                len(database_users),
+                len(element["customRoles"]),
+                len(element["databaseUsers"]),
                 groupNameDict[group],
             )
 
-        except requests.exceptions.HTTPError as e:
-            logger.error(
-                "Failed to fetch automation config for project %s: %s", group, str(e)
-            )
-            logger.error(
-                "This may occur if the project doesn't have automation enabled"
-            )
-            continue
-        except Exception as e:
-            logger.error("Error exporting from project %s: %s", group, str(e))
-            continue
-
-    # Save to file
-    json_object = json.dumps(output, indent=4)
-    with open(outputFile, "w") as outfile:
-        outfile.write(json_object)
-
-    total_users = sum(len(p.get("databaseUsers", [])) for p in output)
-    total_roles = sum(len(p.get("customRoles", [])) for p in output)
     logger.info("")
     logger.info("✓ Export complete: %s", outputFile)
     logger.info(
         "  → %d user(s), %d custom role(s) from %d project(s)",
         total_users,
         total_roles,
-        len(output),
+        writer.count,
     )
-
-
-def generate_secure_password(length: int = 20) -> str:
-    """Generate a secure random password."""
-    # Define character sets
-    lowercase = string.ascii_lowercase
-    uppercase = string.ascii_uppercase
-    digits = string.digits
-    special = "!@#$%^&*-_=+"
-
-    # Ensure at least one character from each set
-    password = [
-        secrets.choice(lowercase),
-        secrets.choice(uppercase),
-        secrets.choice(digits),
-        secrets.choice(special),
-    ]
-
-    # Fill the rest with random characters from all sets
-    all_characters = lowercase + uppercase + digits + special
-    password.extend(secrets.choice(all_characters) for _ in range(length - 4))
-
-    # Shuffle to avoid predictable patterns
-    password_list = list(password)
-    secrets.SystemRandom().shuffle(password_list)
-
-    return "".join(password_list)
+    if state is not None:
+        # Only once the delta file is complete, so a failed run is redone
+        state.save()
+        logger.info(
+            "  → %d project(s) unchanged since the last export (state: %s)",
+            unchanged,
+            stateFile,
+        )
 
 
 def fetch_atlas_custom_roles(
@@ -447,20 +835,9 @@ def fetch_atlas_custom_roles(
     headers = {
         "Accept": "application/vnd.atlas.2023-02-01+json",
     }
-    response = requests.get(
-        atlasUrl + "/api/atlas/v2/groups/" + groupId + "/customDBRoles/roles",
-        auth=HTTPDigestAuth(username, apikey),
-        headers=headers,
-    )
-    response.raise_for_status()
-    roles_data: JsonDict = response.json()
-    # roles_data might be a list directly or a dict with 'results'
-    if isinstance(roles_data, list):
-        return roles_data
-    elif isinstance(roles_data, dict):
-        return roles_data.get("results", [])
-    else:
-        return []
+    url = atlasUrl + "/api/atlas/v2/groups/" + groupId + "/customDBRoles/roles"
+    # The endpoint may return a list directly or a paginated dict with 'results'
+    return list(iter_paginated(url, username, apikey, headers=headers))
 
 
 def create_atlas_custom_role(
@@ -478,13 +855,10 @@ def create_atlas_custom_role(
     }
 
     logger.debug("Creating custom role: %s", rolePayload.get("roleName"))
-    logger.debug("Payload: %s", json.dumps(rolePayload, indent=2))
+    debug_payload("Payload", rolePayload, indent=2)
 
-    response = requests.post(
-        url,
-        auth=HTTPDigestAuth(username, apikey),
-        headers=headers,
-        data=json.dumps(rolePayload),
+    response = make_digest_request(
+        "POST", url, username, apikey, headers=headers, data=json.dumps(rolePayload)
     )
 
     return response
@@ -497,14 +871,8 @@ def fetch_atlas_database_users(
     headers = {
         "Accept": "application/vnd.atlas.2023-02-01+json",
     }
-    response = requests.get(
-        atlasUrl + "/api/atlas/v2/groups/" + groupId + "/databaseUsers",
-        auth=HTTPDigestAuth(username, apikey),
-        headers=headers,
-    )
-    response.raise_for_status()
-    users_data: JsonDict = response.json()
-    return users_data.get("results", [])
+    url = atlasUrl + "/api/atlas/v2/groups/" + groupId + "/databaseUsers"
+    return list(iter_paginated(url, username, apikey, headers=headers))
 
 
 def create_atlas_database_user(
@@ -522,18 +890,15 @@ def create_atlas_database_user(
     }
 
     logger.debug("Creating database user: %s", userPayload.get("username"))
-    logger.debug("User payload: %s", json.dumps(userPayload, indent=2))
+    debug_payload("User payload", userPayload, indent=2)
     logger.debug("URL: %s", url)
 
-    response = requests.post(
-        url,
-        auth=HTTPDigestAuth(username, apikey),
-        data=json.dumps(userPayload),
-        headers=headers,
+    response = make_digest_request(
+        "POST", url, username, apikey, headers=headers, data=json.dumps(userPayload)
     )
 
     logger.debug("Response status code: %s", response.status_code)
-    logger.debug("Response body: %s", response.text)
+    debug_payload("Response body", lambda: response.text)
 
     return response
 
@@ -573,6 +938,158 @@ def transform_user_roles_to_atlas_format(
     return atlas_roles
 
 
+class ProjectImporter:
+    """Imports projects on a pool of workers, streaming their passwords.
+
+    Each submitted job (source project data and destination project) creates
+    its custom roles, then its database users. The password of each created
+    user is written to the CSV as soon as Atlas confirms it, and the user is
+    journaled once the row is synced. Up to concurrency projects run at once
+    and are marked complete in submission order. Leaving the context
+    finishes the projects already started; on error the others are cancelled.
+    """
+
+    def __init__(
+        self,
+        destinationUrl: str,
+        destinationUsername: str,
+        destinationApikey: str,
+        passwords: CredentialSink,
+        journal: ImportJournal,
+        existing: Optional[DestinationSnapshot] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        role_concurrency: int = DEFAULT_CONCURRENCY,
+        user_concurrency: int = 1,
+        password_policy: PasswordPolicy = DEFAULT_POLICY,
+    ):
+        self.destinationUrl = destinationUrl
+        self.destinationUsername = destinationUsername
+        self.destinationApikey = destinationApikey
+        self.passwords = passwords
+        self.journal = journal
+        self.existing = existing
+        self.concurrency = concurrency
+        self.role_concurrency = role_concurrency
+        self.user_concurrency = user_concurrency
+        self.password_policy = password_policy
+        self.timestamp = datetime.now().isoformat()
+        self._in_flight: deque[tuple[JsonDict, Future]] = deque()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "ProjectImporter":
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="janus-import"
+        )
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        try:
+            if exc_type is not None:
+                # Interrupted: only wait for the projects already started
+                for _, future in self._in_flight:
+                    future.cancel()
+            self.drain()
+        finally:
+            self._pool.shutdown()
+            # Journal the users whose passwords are saved, even on error
+            self.passwords.sync()
+
+    def submit(self, job: JsonDict) -> None:
+        self._in_flight.append((job, self._pool.submit(self._import_project, job)))
+        # Read ahead a little so a slow project does not idle the workers
+        while len(self._in_flight) > 2 * self.concurrency:
+            self._finish_project(*self._in_flight.popleft())
+
+    def drain(self) -> None:
+        """Wait for every submitted project and save its passwords."""
+        while self._in_flight:
+            self._finish_project(*self._in_flight.popleft())
+
+    def _import_project(self, job: JsonDict) -> None:
+        """Create the roles, then the users, of one project; runs on a worker."""
+        project_data = job["project_data"]
+        destination_project_id = job["destination_project_id"]
+        journal = self.journal
+
+        # Import custom roles first
+        custom_roles = [
+            role
+            for role in project_data.get("customRoles", [])
+            if not journal.is_done("role", destination_project_id, role.get("role"))
+        ]
+        if custom_roles:
+            logger.info(
+                "  → Creating %d custom role(s) in %s...",
+                len(custom_roles),
+                job["destination_project_name"],
+            )
+            import_custom_roles(
+                self.destinationUrl,
+                destination_project_id,
+                self.destinationUsername,
+                self.destinationApikey,
+                custom_roles,
+                self.existing,
+                journal,
+                concurrency=self.role_concurrency,
+            )
+
+        # Import database users
+        database_users = [
+            user
+            for user in project_data.get("databaseUsers", [])
+            if not journal.is_done("user", destination_project_id, user.get("username"))
+        ]
+        if not database_users:
+            return
+        logger.info(
+            "  → Creating %d database user(s) in %s...",
+            len(database_users),
+            job["destination_project_name"],
+        )
+
+        def save_credentials(credentials: UserDict) -> None:
+            self.passwords.write(
+                self.timestamp,
+                project_data["project"],
+                job["destination_project_name"],
+                destination_project_id,
+                credentials,
+                # Only journaled once its password is safely on disk
+                on_synced=lambda: journal.record(
+                    "user", destination_project_id, credentials["username"]
+                ),
+            )
+
+        import_database_users(
+            self.destinationUrl,
+            destination_project_id,
+            self.destinationUsername,
+            self.destinationApikey,
+            database_users,
+            save_credentials,
+            self.existing,
+            journal,
+            password_policy=self.password_policy,
+            concurrency=self.user_concurrency,
+        )
+
+    def _finish_project(self, job: JsonDict, future: Future) -> None:
+        """Mark a finished project complete; runs in submission order."""
+        project = job["project_data"]["project"]
+        if future.cancelled():
+            return
+        try:
+            future.result()
+        except Exception as e:
+            # Not marked complete, so a resumed import retries the project
+            logger.error("Error importing project %s: %s", project["name"], e)
+            return
+        # Journal the users of the project before the project itself
+        self.passwords.sync()
+        self.journal.complete_project(project["id"])
+
+
 def import_db_users_and_roles(
     inputFile: str,
     destinationUrl: str,
@@ -580,12 +1097,21 @@ def import_db_users_and_roles(
     destinationApikey: str,
     passwordOutputFile: str,
     skipExisting: bool,
+    resume: bool = False,
+    journalFile: Optional[str] = None,
+    projectMap: Optional[dict[str, Any]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    password_policy: PasswordPolicy = DEFAULT_POLICY,
 ) -> None:
-    """Import database users and custom roles to Atlas."""
+    """Import database users and custom roles to Atlas.
 
-    # Read input file
-    with open(inputFile, "r") as openfile:
-        import_data: list[ProjectDict] = json.load(openfile)
+    Completed operations are appended to a journal next to the password CSV,
+    so an interrupted import can be rerun with resume=True. projectMap (see
+    janus.mapping) picks the destination projects instead of prompting.
+    Up to concurrency projects are imported at once, each creating its roles
+    before its users. A project mapped to the same destination as a running
+    one waits for it to finish.
+    """
 
     # Fetch destination projects
     destProjects: JsonDict = fetch_projects(
@@ -609,113 +1135,429 @@ def import_db_users_and_roles(
     skipChoice = questionary.Choice(title="Skip", value="Skip")
     choices.append(skipChoice)
 
-    # Prepare CSV for passwords
-    password_records = []
-    password_records.append(
-        [
-            "timestamp",
-            "source_project",
-            "source_project_id",
-            "destination_project",
-            "destination_project_id",
-            "username",
-            "auth_database",
-            "password",
-            "roles",
-        ]
+    mapper = None
+    if projectMap is not None:
+        try:
+            mapper = ProjectMapper(projectMap, destProjects["results"])
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--projectMap")
+
+    # Existing roles and users of every destination, loaded in the background
+    snapshot = (
+        DestinationSnapshot(
+            lambda group: fetch_atlas_custom_roles(
+                destinationUrl, group, destinationUsername, destinationApikey
+            ),
+            lambda group: fetch_atlas_database_users(
+                destinationUrl, group, destinationUsername, destinationApikey
+            ),
+            concurrency,
+        )
+        if skipExisting
+        else None
     )
 
-    timestamp = datetime.now().isoformat()
+    # Passwords are streamed to the CSV, a resumed import appends to them
+    with CredentialSink(passwordOutputFile, append=resume) as passwords, ImportJournal(
+        journalFile or default_journal_path(passwordOutputFile), resume
+    ) as journal, snapshot or nullcontext():
+        mapped: dict[str, Optional[str]] = {}
+
+        def mapped_destination(project: ProjectDict) -> Optional[str]:
+            """Destination from the journal or the project map, None to prompt."""
+            if project["id"] not in mapped:
+                answer = journal.destination_for(project["id"])
+                if answer is None and mapper is not None:
+                    answer = mapper.resolve(project)
+                mapped[project["id"]] = answer
+            return mapped[project["id"]]
+
+        if snapshot is not None and (mapper is not None or resume):
+            # Start loading every destination known up front, all at once
+            for project_data in read_export(inputFile):
+                project = project_data["project"]
+                if journal.is_project_complete(project["id"]):
+                    continue
+                answer = mapped_destination(project)
+                if answer is not None and answer != SKIP:
+                    snapshot.prefetch(answer)
+
+        with ProjectImporter(
+            destinationUrl,
+            destinationUsername,
+            destinationApikey,
+            passwords,
+            journal,
+            snapshot,
+            concurrency,
+            password_policy=password_policy,
+        ) as importer:
+            # Destinations of the projects submitted since the last drain
+            running: set[str] = set()
+            for project_data in read_export(inputFile):
+                source_project_name = project_data["project"]["name"]
+                source_project_id = project_data["project"]["id"]
+
+                logger.info("")
+                if journal.is_project_complete(source_project_id):
+                    logger.info(
+                        "→ Skipping already imported project: %s (%s)",
+                        source_project_name,
+                        source_project_id,
+                    )
+                    continue
 
-    # Process each project
-    for project_data in import_data:
-        source_project_name = project_data["project"]["name"]
-        source_project_id = project_data["project"]["id"]
+                logger.info(
+                    "→ Processing project: %s (%s)",
+                    source_project_name,
+                    source_project_id,
+                )
 
-        logger.info("")
-        logger.info(
-            "→ Processing project: %s (%s)", source_project_name, source_project_id
-        )
+                # Ask user which destination project to use, unless resumed or mapped
+                answer = mapped_destination(project_data["project"])
+                if answer is None:
+                    # Keep the prompt clear of the output of running projects
+                    importer.drain()
+                    running.clear()
+                if answer is None and source_project_id in destProjectIdNameDict:
+                    answer = questionary.select(
+                        "Found destination Project with same Id. Import into this project?",
+                        instruction="Or choose a different project",
+                        choices=choices,
+                        default=choicesDict[source_project_id],
+                    ).ask()
+                elif answer is None:
+                    answer = questionary.select(
+                        "Destination Project with same Id not found. Select destination project:",
+                        choices=choices,
+                    ).ask()
+
+                if answer == "Skip":
+                    logger.info("Skipping project: %s", source_project_name)
+                    continue
+
+                destination_project_id = answer
+                destination_project_name = destProjectIdNameDict.get(
+                    destination_project_id, destination_project_id
+                )
 
-        # Ask user which destination project to use
-        if source_project_id in destProjectIdNameDict:
-            answer = questionary.select(
-                "Found destination Project with same Id. Import into this project?",
-                instruction="Or choose a different project",
-                choices=choices,
-                default=choicesDict[source_project_id],
-            ).ask()
-        else:
-            answer = questionary.select(
-                "Destination Project with same Id not found. Select destination project:",
-                choices=choices,
-            ).ask()
+                logger.info(
+                    "  → Target: %s (%s)",
+                    destination_project_name,
+                    destination_project_id,
+                )
+                # Its roles and users may depend on roles a running project
+                # creates in the same destination
+                if destination_project_id in running:
+                    importer.drain()
+                    running.clear()
+                running.add(destination_project_id)
+                journal.start_project(source_project_id, destination_project_id)
+                if snapshot is not None:
+                    snapshot.prefetch(destination_project_id)
+
+                importer.submit(
+                    {
+                        "project_data": project_data,
+                        "destination_project_id": destination_project_id,
+                        "destination_project_name": destination_project_name,
+                    }
+                )
 
-        if answer == "Skip":
-            logger.info("Skipping project: %s", source_project_name)
-            continue
+    logger.info("")
+    logger.info("✓ Migration completed successfully")
+    logger.info("  → Users and roles imported to Atlas")
+    logger.info("  → Passwords saved to: %s", passwordOutputFile)
+    logger.info("")
+    logger.warning("⚠  Security reminder: Rotate all passwords immediately!")
 
-        destination_project_id = answer
-        destination_project_name = destProjectIdNameDict[destination_project_id]
 
-        logger.info(
-            "  → Target: %s (%s)", destination_project_name, destination_project_id
+def plan_db_users_and_roles(
+    inputFile: str,
+    destinationUrl: str,
+    destinationUsername: str,
+    destinationApikey: str,
+    planFile: str,
+    projectMap: Optional[dict[str, Any]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> JsonDict:
+    """Plan the import of an export file into Atlas without changing anything.
+
+    The existing roles and users of every mapped destination project are
+    loaded concurrently, then each project is planned in file order: roles
+    in dependency waves, users to create, what already exists, and the
+    roles and users that cannot be created as exported. Projects without a
+    destination in projectMap (default: auto) are left out of the plan.
+    """
+    destProjects: JsonDict = fetch_projects(
+        destinationUrl, destinationUsername, destinationApikey
+    )
+    destProjectIdNameDict = {p["id"]: p["name"] for p in destProjects["results"]}
+    try:
+        mapper = ProjectMapper(projectMap or AUTO_PROJECT_MAP, destProjects["results"])
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--projectMap")
+
+    plan = new_plan("dbUsers", destinationUrl, inputFile)
+    totals = {
+        item: {"create": 0, "skip": 0, "conflict": 0}
+        for item in ("customRoles", "databaseUsers")
+    }
+    api_calls = {"GET": 0, "POST": 0}
+
+    with DestinationSnapshot(
+        lambda group: fetch_atlas_custom_roles(
+            destinationUrl, group, destinationUsername, destinationApikey
+        ),
+        lambda group: fetch_atlas_database_users(
+            destinationUrl, group, destinationUsername, destinationApikey
+        ),
+        concurrency,
+    ) as snapshot:
+        destinations: dict[str, Optional[str]] = {}
+        for project_data in read_export(inputFile):
+            project = project_data["project"]
+            destinations[project["id"]] = mapper.resolve(project)
+            if destinations[project["id"]] not in (None, SKIP):
+                snapshot.prefetch(destinations[project["id"]])
+
+        # Roles and users planned so far in each destination, by name, with
+        # the source project planning them
+        planned_roles: dict[str, dict[str, tuple[RoleDict, str]]] = {}
+        planned_users: dict[str, dict[str, tuple[list[Any], str]]] = {}
+
+        for project_data in read_export(inputFile):
+            project = project_data["project"]
+            destination_id = destinations[project["id"]]
+            if destination_id is None:
+                skip_project(plan, project, "no destination, map it in --projectMap")
+                continue
+            if destination_id == SKIP:
+                skip_project(plan, project, "skipped by the project map")
+                continue
+
+            entry = _plan_project(
+                project_data,
+                destination_id,
+                destProjectIdNameDict.get(destination_id, destination_id),
+                snapshot,
+                planned_roles.setdefault(destination_id, {}),
+                planned_users.setdefault(destination_id, {}),
+            )
+            plan["projects"].append(entry)
+            for item, counts in entry["counts"].items():
+                for outcome, count in counts.items():
+                    totals[item][outcome] += count
+            for method, count in entry["apiCalls"].items():
+                api_calls[method] += count
+
+    plan["summary"] = {"items": totals, "apiCalls": api_calls}
+    write_plan(planFile, plan)
+    log_plan(plan)
+    logger.info("  → Plan saved to: %s", planFile)
+    return plan
+
+
+def _plan_project(
+    project_data: JsonDict,
+    destination_id: str,
+    destination_name: str,
+    snapshot: DestinationSnapshot,
+    planned_roles: dict[str, tuple[RoleDict, str]],
+    planned_users: dict[str, tuple[list[Any], str]],
+) -> JsonDict:
+    """Plan one source project into one destination project."""
+    source = project_data["project"]
+    conflicts: list[JsonDict] = []
+    existing_roles = snapshot.role_names(destination_id)
+
+    skipped_roles: list[str] = []
+    candidates: list[RoleDict] = []
+    for role in project_data.get("customRoles", []):
+        name = role.get("role")
+        if existing_roles is not None and name in existing_roles:
+            skipped_roles.append(name)
+        elif name in planned_roles:
+            other, other_source = planned_roles[name]
+            if other == role:
+                skipped_roles.append(name)
+            else:
+                conflicts.append(
+                    {
+                        "type": "role",
+                        "name": name,
+                        "reason": "defined differently by project %s" % other_source,
+                    }
+                )
+        else:
+            candidates.append(role)
+
+    available = None
+    if existing_roles is not None:
+        available = existing_roles | planned_roles.keys()
+    waves, invalid, duplicates = plan_role_waves(candidates, available)
+    for name, reason in invalid.items():
+        conflicts.append({"type": "role", "name": name, "reason": reason})
+    for role in duplicates:
+        conflicts.append(
+            {
+                "type": "role",
+                "name": role.get("role"),
+                "reason": "duplicate role name, only the first definition is created",
+            }
         )
-
-        # Import custom roles first
-        custom_roles = project_data.get("customRoles", [])
-        if custom_roles:
-            logger.info("  → Creating %d custom role(s)...", len(custom_roles))
-            import_custom_roles(
-                destinationUrl,
-                destination_project_id,
-                destinationUsername,
-                destinationApikey,
-                custom_roles,
-                skipExisting,
+    for wave in waves:
+        for role in wave:
+            planned_roles[role.get("role")] = (role, source["name"])
+
+    def will_exist(role_name: str) -> bool:
+        if role_name in BUILTIN_ROLES or role_name in planned_roles:
+            return True
+        if role_name in invalid:
+            return False
+        # Unknown destination roles are assumed to exist, as on import
+        return existing_roles is None or role_name in existing_roles
+
+    skipped_users: list[str] = []
+    users: list[UserDict] = []
+    for user in project_data.get("databaseUsers", []):
+        name = user.get("username")
+        roles = user.get("roles", [])
+        if snapshot.has_user(destination_id, name, "admin"):
+            skipped_users.append(name)
+            continue
+        if name in planned_users:
+            other_roles, other_source = planned_users[name]
+            if other_roles == roles:
+                skipped_users.append(name)
+            else:
+                conflicts.append(
+                    {
+                        "type": "user",
+                        "name": name,
+                        "reason": "planned with other roles by project %s"
+                        % other_source,
+                    }
+                )
+            continue
+        missing = sorted(
+            {r.get("role") for r in roles if not will_exist(r.get("role"))}
+        )
+        if missing:
+            conflicts.append(
+                {
+                    "type": "user",
+                    "name": name,
+                    "reason": "role(s) %s will not exist" % ", ".join(missing),
+                }
             )
+            continue
+        planned_users[name] = (roles, source["name"])
+        users.append(user)
+
+    created_roles = sum(len(wave) for wave in waves)
+    return {
+        "source": {"id": source["id"], "name": source["name"]},
+        "destination": {"id": destination_id, "name": destination_name},
+        "roleWaves": waves,
+        "users": users,
+        "skipped": {"roles": skipped_roles, "users": skipped_users},
+        "conflicts": conflicts,
+        "counts": {
+            "customRoles": {
+                "create": created_roles,
+                "skip": len(skipped_roles),
+                "conflict": sum(c["type"] == "role" for c in conflicts),
+            },
+            "databaseUsers": {
+                "create": len(users),
+                "skip": len(skipped_users),
+                "conflict": sum(c["type"] == "user" for c in conflicts),
+            },
+        },
+        "apiCalls": {
+            # Apply does not read the destination
+            "GET": 0,
+            "POST": created_roles + len(users),
+        },
+    }
 
-        # Import database users
-        database_users = project_data.get("databaseUsers", [])
-        if database_users:
-            logger.info("  → Creating %d database user(s)...", len(database_users))
-            user_passwords: list[UserDict] = import_database_users(
-                destinationUrl,
-                destination_project_id,
-                destinationUsername,
-                destinationApikey,
-                database_users,
-                skipExisting,
-            )
 
-            # Add to password records
-            for user_pass in user_passwords:
-                user_roles: Any = user_pass.get("roles", [])
-                roles_str = ";".join(
-                    [f"{r['roleName']}@{r['databaseName']}" for r in user_roles]
-                )
-                password_records.append(
-                    [
-                        timestamp,
-                        source_project_name,
-                        source_project_id,
-                        destination_project_name,
-                        destination_project_id,
-                        user_pass["username"],
-                        user_pass["databaseName"],
-                        user_pass["password"],
-                        roles_str,
-                    ]
+def apply_db_users_plan(
+    planFile: str,
+    destinationUrl: str,
+    destinationUsername: str,
+    destinationApikey: str,
+    passwordOutputFile: str,
+    resume: bool = False,
+    journalFile: Optional[str] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    password_policy: PasswordPolicy = DEFAULT_POLICY,
+) -> None:
+    """Create the roles and users of a plan, without reading the destination first.
+
+    Projects are applied one after another, since their roles and users
+    may depend on roles an earlier project creates; the roles of each wave
+    and the users of each project are created concurrency at a time. The
+    journal and password CSV work as for import, so an interrupted apply is
+    resumed with resume=True.
+    """
+    try:
+        plan = read_plan(planFile, "dbUsers", destinationUrl)
+    except (OSError, ValueError) as e:
+        raise typer.BadParameter(str(e), param_hint="--planFile")
+
+    log_plan(plan)
+    with CredentialSink(passwordOutputFile, append=resume) as passwords, ImportJournal(
+        journalFile or default_journal_path(passwordOutputFile), resume
+    ) as journal, ProjectImporter(
+        destinationUrl,
+        destinationUsername,
+        destinationApikey,
+        passwords,
+        journal,
+        # One project at a time, so the concurrency budget goes to its
+        # roles and users, and each project sees the roles of earlier ones
+        concurrency=1,
+        role_concurrency=concurrency,
+        user_concurrency=concurrency,
+        password_policy=password_policy,
+    ) as importer:
+        for entry in plan["projects"]:
+            source = entry["source"]
+            destination = entry["destination"]
+            logger.info("")
+            if journal.is_project_complete(source["id"]):
+                logger.info(
+                    "→ Skipping already applied project: %s (%s)",
+                    source["name"],
+                    source["id"],
                 )
-
-    # Write passwords to CSV
-    with open(passwordOutputFile, "w", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerows(password_records)
+                continue
+            logger.info(
+                "→ Applying project: %s (%s) → %s (%s)",
+                source["name"],
+                source["id"],
+                destination["name"],
+                destination["id"],
+            )
+            journal.start_project(source["id"], destination["id"])
+            importer.submit(
+                {
+                    "project_data": {
+                        "project": source,
+                        "customRoles": [
+                            role for wave in entry["roleWaves"] for role in wave
+                        ],
+                        "databaseUsers": entry["users"],
+                    },
+                    "destination_project_id": destination["id"],
+                    "destination_project_name": destination["name"],
+                }
+            )
 
     logger.info("")
-    logger.info("✓ Migration completed successfully")
-    logger.info("  → Users and roles imported to Atlas")
+    logger.info("✓ Plan applied")
     logger.info("  → Passwords saved to: %s", passwordOutputFile)
     logger.info("")
     logger.warning("⚠  Security reminder: Rotate all passwords immediately!")
@@ -727,59 +1569,106 @@ def import_custom_roles(
     username: str,
     apikey: str,
     custom_roles: list[RoleDict],
-    skipExisting: bool,
+    existing: Optional[DestinationSnapshot] = None,
+    journal: Optional[ImportJournal] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
 ) -> None:
-    """Import custom roles to Atlas project."""
+    """Import custom roles to Atlas project, recording the completed ones in journal.
+
+    Roles are created in dependency waves (see janus.roles), the roles of a
+    wave concurrently. Roles with a missing or cyclic dependency, and later
+    roles reusing the name of a differently defined one, are reported before
+    anything is created, and roles inheriting from a role that failed are
+    skipped. Roles found in the existing snapshot are skipped.
+    """
 
     created_count = 0
     skipped_count = 0
     failed_count = 0
 
-    # Fetch existing roles if skipExisting is True
-    existing_roles = []
-    if skipExisting:
-        try:
-            existing_roles_data = fetch_atlas_custom_roles(
-                atlasUrl, groupId, username, apikey
-            )
-            # existing_roles_data is a list of role objects
-            if isinstance(existing_roles_data, list):
-                existing_roles = [
-                    r.get("roleName")
-                    for r in existing_roles_data
-                    if isinstance(r, dict)
-                ]
-            else:
-                existing_roles = []
-            logger.debug(
-                "Found %d existing custom roles in destination", len(existing_roles)
-            )
-        except Exception as e:
-            logger.warning("Could not fetch existing roles: %s", str(e))
+    existing_roles: Optional[set[str]] = None
+    if existing is not None:
+        existing_roles = existing.role_names(groupId)
 
+    roles_to_create = []
     for role in custom_roles:
         role_name = role.get("role")
 
         # Check if role already exists
-        if skipExisting and role_name in existing_roles:
+        if existing_roles is not None and role_name in existing_roles:
             logger.info("Skipping existing role: %s", role_name)
             skipped_count += 1
+            if journal is not None:
+                journal.record("role", groupId, role_name)
             continue
+        roles_to_create.append(role)
+
+    waves, invalid, duplicates = plan_role_waves(roles_to_create, existing_roles)
+    for role_name, reason in invalid.items():
+        logger.error("Cannot create role %s: %s", role_name, reason)
+        failed_count += 1
+    for role in duplicates:
+        logger.error(
+            "Cannot create role %s: duplicate role name, only the first definition is created",
+            role.get("role"),
+        )
+        failed_count += 1
+    if len(waves) > 1:
+        logger.debug("Creating custom roles in %d dependency waves", len(waves))
 
-        # Transform to Atlas format
-        atlas_role_payload = transform_role_to_atlas_format(role)
+    def create(role: RoleDict) -> Any:
+        return create_atlas_custom_role(
+            atlasUrl, groupId, username, apikey, transform_role_to_atlas_format(role)
+        )
 
-        try:
-            response = create_atlas_custom_role(
-                atlasUrl, groupId, username, apikey, atlas_role_payload
-            )
+    async def create_async(client: Any, role: RoleDict) -> Any:
+        from janus import aio
+
+        return await aio.create_atlas_custom_role(
+            client,
+            atlasUrl,
+            groupId,
+            username,
+            apikey,
+            transform_role_to_atlas_format(role),
+        )
 
-            if response.status_code in [201, 202]:
+    failed_roles = set(invalid)
+    for wave in waves:
+        ready = []
+        for role in wave:
+            failed_dependencies = role_dependencies(role) & failed_roles
+            if failed_dependencies:
+                logger.error(
+                    "Skipping role %s: inherited role(s) %s could not be created",
+                    role.get("role"),
+                    ", ".join(sorted(failed_dependencies)),
+                )
+                failed_roles.add(role.get("role"))
+                failed_count += 1
+            else:
+                ready.append(role)
+
+        for role, response, error in map_with_engine(
+            create, create_async, ready, concurrency
+        ):
+            role_name = role.get("role")
+            if error is not None:
+                logger.error("Error creating role %s: %s", role_name, str(error))
+                failed_roles.add(role_name)
+                failed_count += 1
+            elif response.status_code in [201, 202]:
                 logger.debug("✓ Created custom role: %s", role_name)
                 created_count += 1
+                if existing is not None:
+                    existing.add_role(groupId, role_name)
+                if journal is not None:
+                    journal.record("role", groupId, role_name)
             elif response.status_code == 409:
                 logger.debug("Role already exists: %s", role_name)
                 skipped_count += 1
+                if journal is not None:
+                    journal.record("role", groupId, role_name)
             else:
                 logger.error(
                     "Failed to create role %s: %s %s",
@@ -787,12 +1676,9 @@ def import_custom_roles(
                     response.status_code,
                     response.text,
                 )
+                failed_roles.add(role_name)
                 failed_count += 1
 
-        except Exception as e:
-            logger.error("Error creating role %s: %s", role_name, str(e))
-            failed_count += 1
-
     if created_count > 0 or failed_count > 0:
         logger.info(
             "     Custom roles: %d created, %d skipped, %d failed",
@@ -808,126 +1694,88 @@ def import_database_users(
     username: str,
     apikey: str,
     database_users: list[UserDict],
-    skipExisting: bool,
-) -> list[UserDict]:
-    """Import database users to Atlas project. Returns list of user credentials."""
+    save_credentials: Callable[[UserDict], None],
+    existing: Optional[DestinationSnapshot] = None,
+    journal: Optional[ImportJournal] = None,
+    password_policy: PasswordPolicy = DEFAULT_POLICY,
+    concurrency: int = 1,
+) -> None:
+    """Import database users to Atlas project.
+
+    Up to concurrency users are created at once. The credentials of each
+    created user are passed to save_credentials as soon as Atlas confirms
+    the create, in the order of database_users; recording the user in the
+    journal is left to it, once the password is saved. Users found in the
+    existing snapshot are skipped and recorded in journal.
+    """
 
     created_count = 0
     skipped_count = 0
     failed_count = 0
 
-    user_credentials = []
-
-    # Fetch existing users if skipExisting is True
-    existing_users: list[tuple[Any, Any]] = []
-    if skipExisting:
-        try:
-            existing_users_data = fetch_atlas_database_users(
-                atlasUrl, groupId, username, apikey
-            )
-            existing_users = [
-                (u.get("username"), u.get("databaseName")) for u in existing_users_data
-            ]
-            logger.debug(
-                "Found %d existing database users in destination", len(existing_users)
-            )
-        except Exception as e:
-            logger.warning("Could not fetch existing users: %s", str(e))
+    # One batch for the whole project, ahead of the create calls
+    passwords = iter(PasswordGenerator(password_policy).generate(len(database_users)))
 
+    user_payloads: list[UserDict] = []
     for user in database_users:
         user_name = user.get("username")
-        db_name = user.get("databaseName")
 
         # Check if user already exists (Atlas always uses admin database)
-        if skipExisting and (user_name, "admin") in existing_users:
+        if existing is not None and existing.has_user(groupId, user_name, "admin"):
             logger.info("Skipping existing user: %s@admin", user_name)
             skipped_count += 1
+            if journal is not None:
+                journal.record("user", groupId, user_name)
             continue
 
-        # Generate secure password
-        password = generate_secure_password()
-
-        # Transform roles to Atlas format
-        atlas_roles: list[RoleDict] = transform_user_roles_to_atlas_format(
-            user.get("roles", [])
-        )
-
         # Create user payload
         # Atlas requires all users to be created on the admin database
-        user_payload: UserDict = {
-            "username": user_name,
-            "password": password,
-            "databaseName": "admin",  # Force admin database for Atlas
-            "roles": atlas_roles,
-        }
-
-        try:
-            response = create_atlas_database_user(
-                atlasUrl, groupId, username, apikey, user_payload
-            )
-
-            if response.status_code == 201:
-                logger.info("✓ Created user: %s@%s", user_name, db_name)
+        user_payloads.append(
+            {
+                "username": user_name,
+                "password": next(passwords),
+                "databaseName": "admin",  # Force admin database for Atlas
+                "roles": transform_user_roles_to_atlas_format(user.get("roles", [])),
+            }
+        )
 
-                # Verify the user was actually created
-                try:
-                    verify_users = fetch_atlas_database_users(
-                        atlasUrl, groupId, username, apikey
-                    )
-                    user_exists = any(
-                        u.get("username") == user_name
-                        and u.get("databaseName") == "admin"
-                        for u in verify_users
-                    )
-                    if user_exists:
-                        created_count += 1
-
-                        # Store credentials
-                        user_credentials.append(
-                            {
-                                "username": user_name,
-                                "databaseName": "admin",
-                                "password": password,
-                                "roles": atlas_roles,
-                            }
-                        )
-                    else:
-                        logger.error(
-                            "⚠ User creation returned 201 but user not found in Atlas: %s@admin",
-                            user_name,
-                        )
-                        logger.error("Response body: %s", response.text)
-                        failed_count += 1
-                except Exception as verify_error:
-                    logger.warning(
-                        "Could not verify user creation: %s", str(verify_error)
-                    )
-                    # Still count as created since we got 201
-                    created_count += 1
-                    user_credentials.append(
-                        {
-                            "username": user_name,
-                            "databaseName": "admin",
-                            "password": password,
-                            "roles": atlas_roles,
-                        }
-                    )
+    def create(user_payload: UserDict) -> Any:
+        return create_atlas_database_user(
+            atlasUrl, groupId, username, apikey, user_payload
+        )
 
-            elif response.status_code == 409:
-                logger.debug("User already exists: %s@admin", user_name)
-                skipped_count += 1
+    async def create_async(client: Any, user_payload: UserDict) -> Any:
+        from janus import aio
 
-            else:
-                logger.error(
-                    "Failed to create user %s@admin: %s %s",
-                    user_name,
-                    response.status_code,
-                    response.text,
-                )
-                failed_count += 1
+        return await aio.create_atlas_database_user(
+            client, atlasUrl, groupId, username, apikey, user_payload
+        )
 
-        except Exception as e:
-            logger.error("Error creating user %s@admin: %s", user_name, str(e))
+    for user_payload, response, error in map_with_engine(
+        create, create_async, user_payloads, concurrency
+    ):
+        user_name = user_payload["username"]
+        if error is not None:
+            logger.error("Error creating user %s@admin: %s", user_name, str(error))
+            failed_count += 1
+        elif response.status_code == 201:
+            logger.info("✓ Created user: %s@admin", user_name)
+            created_count += 1
+            save_credentials(user_payload)
+            if existing is not None:
+                existing.add_user(groupId, user_name, "admin")
+        elif response.status_code == 409:
+            logger.debug("User already exists: %s@admin", user_name)
+            skipped_count += 1
+            if journal is not None:
+                journal.record("user", groupId, user_name)
+        else:
+            logger.error(
+                "Failed to create user %s@admin: %s %s",
+                user_name,
+                response.status_code,
+                response.text,
+            )
             failed_count += 1
 
     if created_count > 0 or failed_count > 0:
@@ -937,5 +1785,3 @@ def import_database_users(
             skipped_count,
             failed_count,
         )
-
-    return user_credentials
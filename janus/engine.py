@@ -0,0 +1,99 @@
+import queue
+import threading
+from enum import Enum
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional, TypeVar
+
+from janus.executor import map_ordered
+
+T = TypeVar("T")
+
+
+class Engine(str, Enum):
+    """Transport engine used for the bulk network operations."""
+
+    sync = "sync"
+    async_ = "async"
+
+
+_engine = Engine.sync
+
+
+def set_engine(engine: Engine) -> None:
+    global _engine
+    _engine = Engine(engine)
+
+
+def get_engine() -> Engine:
+    return _engine
+
+
+def is_async_engine() -> bool:
+    return _engine == Engine.async_
+
+
+def map_with_engine(
+    sync_func: Callable[[T], Any],
+    async_func: Callable[[Any, T], Awaitable[Any]],
+    items: Iterable[T],
+    concurrency: int = 1,
+) -> Iterable[tuple[T, Any, Optional[BaseException]]]:
+    """Run an operation for every item on the selected engine, yielding (item, result, error) in input order.
+
+    With the sync engine sync_func(item) runs on a thread pool; with the async
+    engine async_func(client, item) is awaited on a single event loop. Results
+    are yielded as soon as they are available in order.
+    """
+    if not is_async_engine():
+        return map_ordered(sync_func, items, concurrency)
+    return _iter_async(async_func, list(items), concurrency)
+
+
+def _iter_async(
+    async_func: Callable[[Any, T], Awaitable[Any]], items: list[T], concurrency: int
+) -> Iterator[tuple[T, Any, Optional[BaseException]]]:
+    # The event loop runs on its own thread and hands results back as they
+    # complete, so callers can consume (e.g. write) them without waiting for
+    # the whole batch.
+    import asyncio
+
+    from janus import aio
+
+    completed: queue.Queue = queue.Queue()
+    running: dict[str, Any] = {}
+
+    async def main(client):
+        running["loop"] = asyncio.get_running_loop()
+        running["task"] = asyncio.current_task()
+        await aio.map_ordered(
+            lambda item: async_func(client, item),
+            items,
+            concurrency,
+            on_result=lambda *result: completed.put(result),
+        )
+
+    def runner():
+        try:
+            aio.run(main)
+            completed.put(None)
+        except BaseException as e:
+            completed.put(e)
+
+    thread = threading.Thread(target=runner, name="janus-async", daemon=True)
+    thread.start()
+    buffered: dict[int, tuple] = {}
+    next_index = 0
+    try:
+        while next_index < len(items):
+            entry = completed.get()
+            if entry is None:
+                break
+            if isinstance(entry, BaseException):
+                raise entry
+            buffered[entry[0]] = entry[1:]
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    finally:
+        if thread.is_alive() and "task" in running:
+            running["loop"].call_soon_threadsafe(running["task"].cancel)
+        thread.join()
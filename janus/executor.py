@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Default number of projects processed in parallel
+DEFAULT_CONCURRENCY = 4
+
+
+def _call(func: Callable[[T], Any], item: T) -> tuple[Any, Optional[BaseException]]:
+    try:
+        return func(item), None
+    except Exception as e:
+        return None, e
+
+
+def map_ordered(
+    func: Callable[[T], Any], items: Iterable[T], concurrency: int = 1
+) -> Iterator[tuple[T, Any, Optional[BaseException]]]:
+    """Apply func to every item on a pool of workers and yield (item, result, error).
+
+    Results are yielded in the order of items, regardless of completion order.
+    An exception raised for one item is returned as its error and does not
+    cancel the others.
+    """
+    items = list(items)
+    if concurrency <= 1 or len(items) <= 1:
+        for item in items:
+            result, error = _call(func, item)
+            yield item, result, error
+        return
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as pool:
+        futures = [pool.submit(_call, func, item) for item in items]
+        try:
+            for item, future in zip(items, futures):
+                result, error = future.result()
+                yield item, result, error
+        finally:
+            for future in futures:
+                future.cancel()
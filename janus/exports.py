@@ -0,0 +1,145 @@
+import gzip
+import json
+import textwrap
+from datetime import datetime
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+from janus import __version__
+from janus.jsonstream import iter_json_array
+
+FORMAT_VERSION = 1
+READ_CHUNK_SIZE = 1 << 16
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_LEVEL = 6
+
+
+class ExportFormat(str, Enum):
+    """Layout of an export file."""
+
+    ndjson = "ndjson"
+    json = "json"
+    archive = "archive"
+
+
+class ExportWriter:
+    """Write exported projects to a file as each one completes.
+
+    ndjson writes a header record with the export metadata followed by one
+    JSON record per project, flushed as soon as it is written, so memory stays
+    bounded by a single project and a crash keeps every finished project.
+    json writes the legacy pretty-printed array, also incrementally.
+    archive writes gzip compressed ndjson; when dedupe_field is given, every
+    distinct item of that list is stored once as a blob record under the key
+    returned by dedupe_key(item) -> (hash, body) and projects reference the
+    hashes instead.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        kind: str,
+        format: ExportFormat = ExportFormat.ndjson,
+        metadata: Optional[dict[str, Any]] = None,
+        dedupe_field: Optional[str] = None,
+        dedupe_key: Optional[Callable[[Any], tuple[str, Any]]] = None,
+    ):
+        self.path = path
+        self.kind = kind
+        self.format = ExportFormat(format)
+        self.metadata = metadata or {}
+        self.dedupe_field = dedupe_field
+        self.dedupe_key = dedupe_key
+        self.count = 0
+        self._file: Optional[TextIO] = None
+        self._blobs: set[str] = set()
+
+    def __enter__(self) -> "ExportWriter":
+        if self.format == ExportFormat.archive:
+            self._file = gzip.open(
+                self.path, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL
+            )
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+        if self.format != ExportFormat.json:
+            header = {
+                "kind": self.kind,
+                "formatVersion": FORMAT_VERSION,
+                "janusVersion": __version__,
+                "created": datetime.now().isoformat(),
+            }
+            header.update(self.metadata)
+            self._write_line({"header": header})
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.format == ExportFormat.json:
+            self._file.write("\n]" if self.count else "[]")
+        self._file.close()
+        self._file = None
+
+    def _write_line(self, record: dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+    def write(self, project: dict[str, Any]) -> None:
+        """Append one exported project."""
+        if self.format == ExportFormat.json:
+            # Same layout as json.dumps(projects, indent=4) on the whole list
+            self._file.write("[\n" if self.count == 0 else ",\n")
+            self._file.write(textwrap.indent(json.dumps(project, indent=4), "    "))
+        elif self.format == ExportFormat.archive and self.dedupe_field in project:
+            refs = []
+            for item in project[self.dedupe_field]:
+                key, body = self.dedupe_key(item)
+                if key not in self._blobs:
+                    self._blobs.add(key)
+                    self._write_line({"blob": {"hash": key, "body": body}})
+                refs.append(key)
+            record = {k: v for k, v in project.items() if k != self.dedupe_field}
+            record["refs"] = {self.dedupe_field: refs}
+            self._write_line(record)
+        else:
+            self._write_line(project)
+        self._file.flush()
+        self.count += 1
+
+
+def read_export(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the exported projects of an export file, whichever format it was written in.
+
+    The file is read incrementally, so memory stays bounded by the largest
+    single project.
+    """
+    with open(path, "rb") as probe:
+        compressed = probe.read(2) == GZIP_MAGIC
+    if compressed:
+        infile = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        infile = open(path, "r", encoding="utf-8")
+
+    with infile:
+        first = infile.read(1)
+        while first.isspace():
+            first = infile.read(1)
+        infile.seek(0)
+
+        if first == "[":
+            # Legacy pretty-printed JSON array, parsed one project at a time
+            yield from iter_json_array(iter(partial(infile.read, READ_CHUNK_SIZE), ""))
+            return
+
+        blobs: dict[str, Any] = {}
+        for line in infile:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "header" in record:
+                continue
+            if "blob" in record:
+                blobs[record["blob"]["hash"]] = record["blob"]["body"]
+                continue
+            for field, refs in record.pop("refs", {}).items():
+                record[field] = [blobs[ref] for ref in refs]
+            yield record
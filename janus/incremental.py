@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Optional
+
+from janus.logging import logger
+
+STATE_SUFFIX = ".state"
+STATE_FORMAT_VERSION = 1
+
+
+def default_state_path(path: str) -> str:
+    """State file kept next to the given output file."""
+    return path + STATE_SUFFIX
+
+
+def content_hash(project: dict[str, Any]) -> str:
+    """Digest of an exported project record, independent of key order."""
+    canonical = json.dumps(project, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ExportState:
+    """Automation config version and content hash of every exported project.
+
+    An incremental export compares each project against this state: a project
+    whose automation config version is unchanged is not fetched again, and one
+    whose exported content hashes the same is not written again. The state is
+    only saved once the delta file is complete, so an interrupted run is
+    simply redone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.projects: dict[str, dict[str, Any]] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as infile:
+                state = json.load(infile)
+        except FileNotFoundError:
+            logger.info("No export state found at %s, exporting every project", path)
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(
+                "Ignoring unreadable export state %s (%s), exporting every project",
+                path,
+                e,
+            )
+            return
+        self.projects = state.get("projects", {})
+
+    def version_of(self, project_id: str) -> Optional[Any]:
+        """Automation config version the project had when it was last exported."""
+        return self.projects.get(project_id, {}).get("version")
+
+    def is_unchanged(self, project_id: str, digest: str) -> bool:
+        return self.projects.get(project_id, {}).get("hash") == digest
+
+    def update(self, project_id: str, version: Any, digest: str) -> None:
+        self.projects[project_id] = {
+            "version": version,
+            "hash": digest,
+            "exported": datetime.now().isoformat(),
+        }
+
+    def save(self) -> None:
+        """Replace the state file atomically."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as outfile:
+            json.dump(
+                {"formatVersion": STATE_FORMAT_VERSION, "projects": self.projects},
+                outfile,
+                indent=2,
+            )
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp_path, self.path)
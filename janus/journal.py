@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Optional
+
+from janus.logging import logger
+
+JOURNAL_SUFFIX = ".journal"
+
+# Item records written between two fsyncs, when no project boundary comes first
+SYNC_EVERY = 500
+
+
+def default_journal_path(path: str) -> str:
+    """Journal file kept next to the given output/input file."""
+    return path + JOURNAL_SUFFIX
+
+
+class ImportJournal:
+    """Append-only record of completed import operations.
+
+    Every created (or already existing) item and every finished project is
+    appended as one JSON line and handed to the OS at once, so nothing is
+    lost if Janus stops. Item records are synced to disk every sync_every
+    records, project records and the records before them immediately.
+    With resume=True the existing journal is replayed first, so finished
+    projects and items are skipped without any API call and projects that
+    were in progress keep the destination chosen for them.
+    Records may be appended from several threads.
+    """
+
+    def __init__(self, path: str, resume: bool = False, sync_every: int = SYNC_EVERY):
+        self.path = path
+        self.resume = resume
+        self.sync_every = sync_every
+        self._unsynced = 0
+        self._destinations: dict[str, str] = {}
+        self._completed_projects: set[str] = set()
+        self._done: set[tuple[str, str, str]] = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ImportJournal":
+        if self.resume:
+            self._replay()
+        elif os.path.exists(self.path):
+            logger.info("Starting a new import journal, replacing %s", self.path)
+        self._file = open(self.path, "a" if self.resume else "w", encoding="utf-8")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._append(None, sync=True)
+        self._file.close()
+        self._file = None
+
+    def _replay(self) -> None:
+        try:
+            infile = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            logger.info(
+                "No import journal found at %s, starting from scratch", self.path
+            )
+            return
+        with infile:
+            for line in infile:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A record cut short by a crash, the operation is redone
+                    continue
+                op = record.get("op")
+                if op == "project":
+                    self._destinations[record["source"]] = record["destination"]
+                elif op == "projectComplete":
+                    self._completed_projects.add(record["source"])
+                elif op == "item":
+                    self._done.add(
+                        (record["kind"], record["destination"], record["key"])
+                    )
+        logger.info(
+            "Resuming from %s: %d project(s) complete, %d item(s) done",
+            self.path,
+            len(self._completed_projects),
+            len(self._done),
+        )
+
+    def _append(self, record: Optional[dict[str, Any]], sync: bool = False) -> None:
+        """Write record, if any, and fsync when sync is set or a batch is full."""
+        if record is not None:
+            record["time"] = datetime.now().isoformat()
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if record is not None:
+                self._file.write(line)
+                self._file.flush()
+                self._unsynced += 1
+            if self._unsynced and (sync or self._unsynced >= self.sync_every):
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def destination_for(self, source_id: str) -> Optional[str]:
+        """Destination project chosen for a source project in an earlier run."""
+        return self._destinations.get(source_id)
+
+    def is_project_complete(self, source_id: str) -> bool:
+        return source_id in self._completed_projects
+
+    def is_done(self, kind: str, destination_id: str, key: str) -> bool:
+        return (kind, destination_id, key) in self._done
+
+    def start_project(self, source_id: str, destination_id: str) -> None:
+        if self._destinations.get(source_id) != destination_id:
+            self._destinations[source_id] = destination_id
+            self._append(
+                {"op": "project", "source": source_id, "destination": destination_id},
+                sync=True,
+            )
+
+    def record(self, kind: str, destination_id: str, key: str) -> None:
+        """Record an item that needs no further work in the destination project."""
+        self._done.add((kind, destination_id, key))
+        self._append(
+            {"op": "item", "kind": kind, "destination": destination_id, "key": key}
+        )
+
+    def complete_project(self, source_id: str) -> None:
+        self._completed_projects.add(source_id)
+        self._append({"op": "projectComplete", "source": source_id}, sync=True)
@@ -0,0 +1,280 @@
+"""Incremental JSON reading on top of the stdlib json module.
+
+JsonReader walks a JSON document delivered as a stream of text chunks. It
+can iterate arrays and objects, materialize selected values (parsed with
+json's raw_decode once their extent is known) and skip any other value
+without keeping it in memory, so only the parts that are asked for are
+ever held at once. select_fields builds on it to pull a few subtrees out of
+a large document.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_CONTAINER_TOKEN = re.compile(r'["{}\[\]]')
+_STRING_REST = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r"[^,\]}\s]+")
+
+# Consumed text kept in the buffer before it is compacted
+_COMPACT_AT = 1 << 20
+
+# Bytes read at a time from a streamed HTTP response
+STREAM_CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+
+class JsonReader:
+    """Pull reader over a JSON document split in text chunks."""
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append more input to the buffer, returning False at end of input.
+
+        At least as much text as is already buffered is read each time, so a
+        value that spans many chunks is copied a bounded number of times.
+        """
+        if self._eof:
+            return False
+        pieces = []
+        size = 0
+        wanted = max(len(self._buf), 1)
+        for chunk in self._chunks:
+            pieces.append(chunk)
+            size += len(chunk)
+            if size >= wanted:
+                break
+        else:
+            self._eof = True
+        if not size:
+            return False
+        self._buf += "".join(pieces)
+        return True
+
+    def peek(self) -> str:
+        """Return the next significant character without consuming it ('' at end of input)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            self._buf = ""
+            self._pos = 0
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self._pos += 1
+
+    def _value_end(self, keep: bool) -> int:
+        """Return the end offset of the value at the current position.
+
+        When keep is False the text scanned so far is dropped as more input
+        is read, so skipping a value needs no more memory than one chunk.
+        """
+        first = self.peek()
+        if first == "":
+            raise ValueError("Unexpected end of JSON input")
+        if self._pos > _COMPACT_AT:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        i = self._pos + 1
+
+        if first not in '{["':
+            while True:
+                match = _SCALAR.match(self._buf, self._pos)
+                if match is None:
+                    raise ValueError(f"Unexpected {first!r} in JSON input")
+                if match.end() < len(self._buf) or not self._fill():
+                    return match.end()
+
+        depth = 0 if first == '"' else 1
+        in_string = first == '"'
+        while True:
+            if in_string:
+                match = _STRING_REST.match(self._buf, i)
+                if match is None:
+                    if not keep:
+                        # Nothing before the open string is needed any more
+                        self._buf = self._buf[i:]
+                        self._pos = i = 0
+                    if not self._fill():
+                        raise ValueError("Unterminated string in JSON input")
+                    continue
+                i = match.end()
+                in_string = False
+                if depth == 0:
+                    return i
+                continue
+
+            match = _CONTAINER_TOKEN.search(self._buf, i)
+            if match is None:
+                if not keep:
+                    self._buf = ""
+                    self._pos = i = 0
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON input")
+                continue
+            i = match.end()
+            token = match.group()
+            if token == '"':
+                in_string = True
+            elif token in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return i
+
+    def read_value(self) -> Any:
+        """Parse and return the value at the current position."""
+        first = self.peek()
+        if first == "":
+            raise ValueError("Unexpected end of JSON input")
+        if self._pos > _COMPACT_AT:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        if first not in '{["':
+            # Make sure the whole number/literal is buffered
+            self._value_end(keep=True)
+        while True:
+            # Parsing in C and retrying on a larger buffer is much faster
+            # than locating the end of the value first
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            self._pos = end
+            return value
+
+    def skip_value(self) -> None:
+        """Consume the value at the current position without materializing it."""
+        self._pos = self._value_end(keep=False)
+
+    def iter_array(self) -> Iterator[None]:
+        """Iterate the array at the current position.
+
+        Yields once per element; the caller must consume each element with
+        read_value, skip_value or a nested iteration before resuming.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            separator = self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' but found {separator!r}")
+
+    def iter_object(self) -> Iterator[str]:
+        """Iterate the object at the current position, yielding each key.
+
+        The caller must consume the value of every key before resuming.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' but found {separator!r}")
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """Yield the elements of a top level JSON array one at a time."""
+    reader = JsonReader(chunks)
+    for _ in reader.iter_array():
+        yield reader.read_value()
+
+
+def iter_decoded(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a stream of byte chunks, including characters split across chunks."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def select_fields(chunks: Iterable[str], fields: Iterable[str]) -> dict[str, Any]:
+    """Read only the given dotted key paths of a top level JSON object.
+
+    Every other value is skipped as it streams by. The result keeps the
+    nesting of the document, so select_fields(chunks, ["auth.usersWanted"])
+    returns {"auth": {"usersWanted": [...]}}; paths missing from the
+    document, or leading through a value that is not an object, are left
+    out.
+    """
+    wanted: dict[str, Any] = {}
+    for field in fields:
+        node = wanted
+        *parents, last = field.split(".")
+        for key in parents:
+            child = node.setdefault(key, {})
+            if child is None:
+                # An enclosing path is already read in full
+                break
+            node = child
+        else:
+            node[last] = None
+    reader = JsonReader(chunks)
+    if reader.peek() != "{":
+        raise ValueError(f"Expected a JSON object but found {reader.peek()!r}")
+    return _select(reader, wanted)
+
+
+def _select(reader: JsonReader, wanted: dict[str, Any]) -> dict[str, Any]:
+    selected: dict[str, Any] = {}
+    for key in reader.iter_object():
+        if key not in wanted:
+            _drop(reader)
+        elif wanted[key] is None:
+            selected[key] = reader.read_value()
+        elif reader.peek() == "{":
+            selected[key] = _select(reader, wanted[key])
+        else:
+            _drop(reader)
+    return selected
+
+
+def _drop(reader: JsonReader) -> None:
+    """Skip the value at the current position one element or member at a time.
+
+    Parsing each element in C and dropping it is several times faster than
+    scanning it with skip_value, and still only holds one element at once.
+    """
+    first = reader.peek()
+    if first == "[":
+        for _ in reader.iter_array():
+            reader.read_value()
+    elif first == "{":
+        for _ in reader.iter_object():
+            reader.read_value()
+    else:
+        reader.skip_value()
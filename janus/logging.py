@@ -1,32 +1,126 @@
+import itertools
+import json
 import logging
 import os
 
-# set up logging to file - see previous section for more details
 logPath = "log"
-if not os.path.isdir(logPath):
-    os.mkdir(logPath)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s {%(filename)-12s:%(lineno)d} %(levelname)-8s %(message)s",
-    datefmt="%m-%d %H:%M",
-    filename=logPath + "/janus.log",
-    filemode="a",
-)
-# define a Handler which writes INFO messages or higher to the sys.stderr
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
-# set a format which is simpler for console use
-formatter = logging.Formatter("%(message)s")
-# tell the handler to use this format
-console.setFormatter(formatter)
-# add the handler to the root logger
-logging.getLogger().addHandler(console)
 
+# Longest payload written by one debug record, in characters
+DEBUG_PAYLOAD_LIMIT = 10_000
+# Keys whose values are never written to the log
+REDACTED_KEYS = frozenset(["password"])
 
 logger = logging.getLogger()
 
+# Console handler, created by setup_logging
+console = None
+
+
+def setup_logging():
+    """Log INFO and above to log/janus.log and the console.
+
+    Called once a command actually runs, so importing janus or asking for
+    --help/version creates no log directory or handlers. Repeated calls are
+    no-ops.
+    """
+    global console
+    if console is not None:
+        return
+    # set up logging to file - see previous section for more details
+    if not os.path.isdir(logPath):
+        os.mkdir(logPath)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s {%(filename)-12s:%(lineno)d} %(levelname)-8s %(message)s",
+        datefmt="%m-%d %H:%M",
+        filename=logPath + "/janus.log",
+        filemode="a",
+    )
+    # define a Handler which writes INFO messages or higher to the sys.stderr
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+    # set a format which is simpler for console use
+    formatter = logging.Formatter("%(message)s")
+    # tell the handler to use this format
+    console.setFormatter(formatter)
+    # add the handler to the root logger
+    logging.getLogger().addHandler(console)
+
 
 def setDebugLogLevel():
+    setup_logging()
     console.setLevel(logging.DEBUG)
     logger.setLevel(logging.DEBUG)
+
+
+class DebugPayload:
+    """Payload rendered only if the log record holding it is emitted.
+
+    payload may be a callable returning the value, so even collecting it is
+    deferred. Dicts and lists are serialized to JSON with any REDACTED_KEYS
+    masked, and serialization stops at limit characters.
+    """
+
+    def __init__(self, payload, indent=None, limit=DEBUG_PAYLOAD_LIMIT):
+        self.payload = payload
+        self.indent = indent
+        self.limit = limit
+
+    def __str__(self):
+        payload = self.payload() if callable(self.payload) else self.payload
+        if isinstance(payload, str):
+            chunks = [payload]
+        else:
+            encoder = json.JSONEncoder(indent=self.indent, default=str)
+            chunks = encoder.iterencode(_redact(payload))
+        # Stop serializing once the limit is reached
+        parts = []
+        size = 0
+        for chunk in chunks:
+            parts.append(chunk)
+            size += len(chunk)
+            if self.limit and size > self.limit:
+                return "".join(parts)[: self.limit] + "... [truncated]"
+        return "".join(parts)
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {
+            k: "***" if k in REDACTED_KEYS else _redact(v) for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+_payload_limit = DEBUG_PAYLOAD_LIMIT
+_sample_every = 1
+_sample_counters = {}
+
+
+def configure_debug_payloads(limit=DEBUG_PAYLOAD_LIMIT, sample_every=1):
+    """Set the default size cap (0 for none) and sampling of debug payloads."""
+    global _payload_limit, _sample_every
+    _payload_limit = limit
+    _sample_every = sample_every
+
+
+def debug_payload(message, payload, indent=None, limit=None, sample_every=None):
+    """Log message followed by payload at DEBUG, paying nothing when DEBUG is off.
+
+    With sample_every=n only one call in n (per message) is logged, for
+    payloads logged once per item of a large batch.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if limit is None:
+        limit = _payload_limit
+    if sample_every is None:
+        sample_every = _sample_every
+    if sample_every > 1:
+        counter = _sample_counters.setdefault(message, itertools.count())
+        if next(counter) % sample_every:
+            return
+    logger.debug("%s: %s", message, DebugPayload(payload, indent, limit), stacklevel=2)
@@ -0,0 +1,144 @@
+"""Unattended project selection for export and project mapping for import.
+
+A project map file (YAML or JSON) tells import where each source project
+goes, so no prompt is needed:
+
+    default: auto          # for projects not listed: auto, skip or prompt
+    projects:
+      5f1a...: 6a2b...     # source id -> destination id
+      Billing: Billing-Prod  # source name -> destination name
+      Sandbox: skip
+      Payments: auto       # same id, else same name, in the destination
+
+Sources and destinations may be given by id or name.
+"""
+
+from fnmatch import fnmatchcase
+from typing import Any, Optional
+
+import typer
+import yaml
+
+from janus.logging import logger
+
+# Value of the Skip choice offered by the import prompts
+SKIP = "Skip"
+AUTO = "auto"
+PROMPT = "prompt"
+
+ProjectDict = dict[str, Any]
+
+
+def load_project_map(path: str) -> dict[str, Any]:
+    """Load and validate a project map file."""
+    with open(path, "r", encoding="utf-8") as infile:
+        # JSON is valid YAML, so both formats are read the same way
+        mapping = yaml.safe_load(infile) or {}
+    if not isinstance(mapping, dict):
+        raise ValueError(f"{path}: expected a mapping with 'default' and 'projects'")
+    default = str(mapping.get("default", AUTO)).lower()
+    if default not in (AUTO, SKIP.lower(), PROMPT):
+        raise ValueError(f"{path}: default must be auto, skip or prompt")
+    projects = mapping.get("projects") or {}
+    if not isinstance(projects, dict):
+        raise ValueError(f"{path}: 'projects' must map source projects to targets")
+    return {
+        "default": default,
+        "projects": {str(k): str(v) for k, v in projects.items()},
+    }
+
+
+def project_map_callback(value: Optional[str]) -> Optional[dict[str, Any]]:
+    """Typer callback turning a --projectMap path into the loaded map."""
+    if value is None:
+        return None
+    try:
+        return load_project_map(value)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        raise typer.BadParameter(str(e))
+
+
+class ProjectMapper:
+    """Resolve source projects to destination projects from a project map.
+
+    The destination projects are indexed by id and name once, and every
+    explicit target of the map is checked up front, so a bad map fails
+    before anything is imported.
+    """
+
+    def __init__(
+        self, mapping: dict[str, Any], destination_projects: list[ProjectDict]
+    ):
+        self.default = mapping["default"]
+        self.targets = mapping["projects"]
+        self._ids = {p["id"] for p in destination_projects}
+        self._names: dict[str, Optional[str]] = {}
+        for project in destination_projects:
+            # Names are not unique, an ambiguous name cannot be matched
+            name = project["name"]
+            self._names[name] = None if name in self._names else project["id"]
+
+        unknown = [
+            target
+            for target in self.targets.values()
+            if target.lower() not in (AUTO, SKIP.lower(), PROMPT)
+            and self._lookup(target) is None
+        ]
+        if unknown:
+            raise ValueError(
+                "Unknown or ambiguous destination project(s) in project map: "
+                + ", ".join(sorted(set(unknown)))
+            )
+
+    def _lookup(self, id_or_name: str) -> Optional[str]:
+        if id_or_name in self._ids:
+            return id_or_name
+        return self._names.get(id_or_name)
+
+    def resolve(self, source_project: ProjectDict) -> Optional[str]:
+        """Return the destination project id, SKIP, or None when the user must be asked."""
+        target = self.targets.get(source_project["id"])
+        if target is None:
+            target = self.targets.get(source_project["name"], self.default)
+        if target.lower() == SKIP.lower():
+            return SKIP
+        if target.lower() == PROMPT:
+            return None
+        if target.lower() != AUTO:
+            return self._lookup(target)
+        destination = self._lookup(source_project["id"])
+        if destination is None:
+            destination = self._names.get(source_project["name"])
+        if destination is None:
+            logger.warning(
+                "No destination project matches %s (%s), skipping it",
+                source_project["name"],
+                source_project["id"],
+            )
+            return SKIP
+        return destination
+
+
+def select_projects(
+    projects: list[ProjectDict],
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None,
+) -> list[str]:
+    """Return the ids of the projects matching any include and no exclude pattern.
+
+    Patterns are shell-style wildcards matched against the project id and name;
+    without include patterns every project is included.
+    """
+
+    def matches(project: ProjectDict, patterns: list[str]) -> bool:
+        return any(
+            fnmatchcase(project["id"], pattern) or fnmatchcase(project["name"], pattern)
+            for pattern in patterns
+        )
+
+    return [
+        project["id"]
+        for project in projects
+        if (not include or matches(project, include))
+        and not (exclude and matches(project, exclude))
+    ]
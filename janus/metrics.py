@@ -0,0 +1,282 @@
+import bisect
+import json
+import re
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path segments that identify one object rather than an endpoint
+_GROUP_SEGMENT = re.compile(r"(/groups/)[^/]+")
+_ID_SEGMENT = re.compile(r"/[0-9a-f]{24}(?=/|$)")
+
+
+def endpoint_of(url: str) -> str:
+    """Path of url with project and object ids replaced by placeholders."""
+    path = urlsplit(url).path.rstrip("/")
+    path = _GROUP_SEGMENT.sub(r"\1{groupId}", path)
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class RequestStats:
+    """Latency and transfer totals for one method, endpoint and status."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+_lock = threading.Lock()
+_requests: dict[tuple[str, str, str], RequestStats] = {}
+_retries: dict[tuple[str, str], int] = {}
+_backoff_seconds = 0.0
+_rate_limit_wait_seconds = 0.0
+_started = time.monotonic()
+
+
+def reset() -> None:
+    """Forget everything recorded so far and restart the run clock."""
+    global _backoff_seconds, _rate_limit_wait_seconds, _started
+    with _lock:
+        _requests.clear()
+        _retries.clear()
+        _backoff_seconds = 0.0
+        _rate_limit_wait_seconds = 0.0
+        _started = time.monotonic()
+
+
+def record_request(
+    method: str,
+    url: str,
+    status: Any,
+    seconds: float,
+    bytes_sent: int = 0,
+    bytes_received: int = 0,
+) -> None:
+    """Record one API call attempt; status is the HTTP status or 'error'."""
+    key = (method, endpoint_of(url), str(status))
+    with _lock:
+        stats = _requests.get(key)
+        if stats is None:
+            stats = _requests[key] = RequestStats()
+        stats.latency.observe(seconds)
+        stats.bytes_sent += bytes_sent
+        stats.bytes_received += bytes_received
+
+
+def record_retry(method: str, url: str, delay: float) -> None:
+    global _backoff_seconds
+    key = (method, endpoint_of(url))
+    with _lock:
+        _retries[key] = _retries.get(key, 0) + 1
+        _backoff_seconds += delay
+
+
+def record_rate_limit_wait(seconds: float) -> None:
+    global _rate_limit_wait_seconds
+    with _lock:
+        _rate_limit_wait_seconds += seconds
+
+
+def snapshot() -> dict[str, Any]:
+    """All metrics recorded so far, as plain data."""
+    with _lock:
+        requests = [
+            {
+                "method": method,
+                "endpoint": endpoint,
+                "status": status,
+                "count": stats.latency.count,
+                "seconds": round(stats.latency.sum, 6),
+                "p50": round(stats.latency.quantile(0.5), 6),
+                "p95": round(stats.latency.quantile(0.95), 6),
+                "max": round(stats.latency.max, 6),
+                "buckets": dict(
+                    zip(
+                        [str(b) for b in LATENCY_BUCKETS] + ["+Inf"],
+                        _cumulative(stats.latency.counts),
+                    )
+                ),
+                "bytesSent": stats.bytes_sent,
+                "bytesReceived": stats.bytes_received,
+            }
+            for (method, endpoint, status), stats in sorted(_requests.items())
+        ]
+        retries = [
+            {"method": method, "endpoint": endpoint, "count": count}
+            for (method, endpoint), count in sorted(_retries.items())
+        ]
+        return {
+            "wallSeconds": round(time.monotonic() - _started, 6),
+            "requests": requests,
+            "retries": retries,
+            "backoffSeconds": round(_backoff_seconds, 6),
+            "rateLimitWaitSeconds": round(_rate_limit_wait_seconds, 6),
+        }
+
+
+def _cumulative(counts: list[int]) -> list[int]:
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+def summary_lines(data: Optional[dict[str, Any]] = None) -> list[str]:
+    """Human readable end-of-run performance report."""
+    data = data or snapshot()
+    requests = data["requests"]
+    if not requests:
+        return []
+    wall = data["wallSeconds"]
+    count = sum(r["count"] for r in requests)
+    api_seconds = sum(r["seconds"] for r in requests)
+    failed = sum(r["count"] for r in requests if not r["status"].startswith(("2", "3")))
+    retried = sum(r["count"] for r in data["retries"])
+    received = sum(r["bytesReceived"] for r in requests)
+    sent = sum(r["bytesSent"] for r in requests)
+
+    lines = [
+        "Performance summary (%.1fs wall clock)" % wall,
+        "  API calls: %d (%d retried, %d not successful), %.1f MB received, %.1f MB sent"
+        % (count, retried, failed, received / 1e6, sent / 1e6),
+        # More API time than wall time means calls overlapped
+        "  Time in API calls: %.1fs (%.1fx wall clock), rate limit waits: %.1fs, retry backoff: %.1fs"
+        % (
+            api_seconds,
+            api_seconds / wall if wall else 0.0,
+            data["rateLimitWaitSeconds"],
+            data["backoffSeconds"],
+        ),
+        "  %-7s %-58s %6s %7s %8s %8s %8s"
+        % ("Method", "Endpoint", "Status", "Count", "p50 ms", "p95 ms", "max ms"),
+    ]
+    for r in requests:
+        lines.append(
+            "  %-7s %-58s %6s %7d %8.0f %8.0f %8.0f"
+            % (
+                r["method"],
+                r["endpoint"],
+                r["status"],
+                r["count"],
+                r["p50"] * 1000,
+                r["p95"] * 1000,
+                r["max"] * 1000,
+            )
+        )
+    return lines
+
+
+def prometheus_text(data: Optional[dict[str, Any]] = None) -> str:
+    """Metrics in the Prometheus text exposition format (node_exporter textfile)."""
+    data = data or snapshot()
+    lines = [
+        "# HELP janus_request_duration_seconds API call latency.",
+        "# TYPE janus_request_duration_seconds histogram",
+    ]
+    for r in data["requests"]:
+        labels = 'method="%s",endpoint="%s",status="%s"' % (
+            r["method"],
+            r["endpoint"],
+            r["status"],
+        )
+        for bound, cumulative in r["buckets"].items():
+            lines.append(
+                'janus_request_duration_seconds_bucket{%s,le="%s"} %d'
+                % (labels, bound, cumulative)
+            )
+        lines.append(
+            "janus_request_duration_seconds_sum{%s} %s" % (labels, r["seconds"])
+        )
+        lines.append(
+            "janus_request_duration_seconds_count{%s} %d" % (labels, r["count"])
+        )
+    for name, key, help in (
+        ("janus_request_bytes_sent_total", "bytesSent", "Request body bytes sent."),
+        (
+            "janus_response_bytes_received_total",
+            "bytesReceived",
+            "Response body bytes received.",
+        ),
+    ):
+        lines.append("# HELP %s %s" % (name, help))
+        lines.append("# TYPE %s counter" % name)
+        for r in data["requests"]:
+            lines.append(
+                '%s{method="%s",endpoint="%s",status="%s"} %d'
+                % (name, r["method"], r["endpoint"], r["status"], r[key])
+            )
+    lines.append("# HELP janus_request_retries_total API calls retried.")
+    lines.append("# TYPE janus_request_retries_total counter")
+    for r in data["retries"]:
+        lines.append(
+            'janus_request_retries_total{method="%s",endpoint="%s"} %d'
+            % (r["method"], r["endpoint"], r["count"])
+        )
+    for name, key, help in (
+        (
+            "janus_retry_backoff_seconds_total",
+            "backoffSeconds",
+            "Time spent backing off before retries.",
+        ),
+        (
+            "janus_rate_limit_wait_seconds_total",
+            "rateLimitWaitSeconds",
+            "Time spent waiting for the per host request budget.",
+        ),
+        ("janus_run_duration_seconds", "wallSeconds", "Wall clock time of the run."),
+    ):
+        lines.append("# HELP %s %s" % (name, help))
+        lines.append(
+            "# TYPE %s %s" % (name, "gauge" if key == "wallSeconds" else "counter")
+        )
+        lines.append("%s %s" % (name, data[key]))
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str) -> None:
+    """Write the metrics to path, in Prometheus text format for .prom files and JSON otherwise."""
+    data = snapshot()
+    with open(path, "w", encoding="utf-8") as outfile:
+        if path.endswith(".prom"):
+            outfile.write(prometheus_text(data))
+        else:
+            json.dump(data, outfile, indent=2)
@@ -0,0 +1,118 @@
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Iterator, Optional
+
+from janus.client import POOL_MAXSIZE, make_digest_request
+from janus.logging import logger
+
+# Ops Manager and Atlas both cap itemsPerPage at 500
+ITEMS_PER_PAGE = 500
+# Number of pages fetched in parallel once totalCount is known
+PAGE_WORKERS = 4
+
+# Page fetches share long lived threads so each keeps its digest nonce
+_page_pool: Optional[ThreadPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool() -> ThreadPoolExecutor:
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ThreadPoolExecutor(
+                max_workers=POOL_MAXSIZE, thread_name_prefix="janus-page"
+            )
+        return _page_pool
+
+
+def _fetch_page(
+    url: str,
+    username: str,
+    apikey: str,
+    verify_ssl: bool,
+    headers: Optional[dict],
+    page_num: int,
+    items_per_page: int,
+) -> Any:
+    params = {"pageNum": page_num, "itemsPerPage": items_per_page}
+    response = make_digest_request(
+        "GET", url, username, apikey, verify_ssl, headers=headers, params=params
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_paginated(
+    url: str,
+    username: str,
+    apikey: str,
+    verify_ssl: bool = True,
+    headers: Optional[dict] = None,
+    items_per_page: int = ITEMS_PER_PAGE,
+    max_workers: int = PAGE_WORKERS,
+) -> Iterator[Any]:
+    """Yield every item of an Ops Manager/Atlas list endpoint, across all pages.
+
+    The first page is fetched on its own to learn totalCount; the remaining
+    pages are then requested concurrently and yielded in page order. Endpoints
+    that return a bare list (no paging envelope) are yielded as-is.
+    """
+    first = _fetch_page(url, username, apikey, verify_ssl, headers, 1, items_per_page)
+    if isinstance(first, list):
+        yield from first
+        return
+
+    results = first.get("results", [])
+    yield from results
+
+    total = first.get("totalCount")
+    if total is None:
+        # No totalCount reported, walk the pages until a short one comes back
+        page_num = 1
+        while len(results) == items_per_page:
+            page_num += 1
+            page = _fetch_page(
+                url, username, apikey, verify_ssl, headers, page_num, items_per_page
+            )
+            results = page.get("results", [])
+            yield from results
+        return
+
+    # The server may cap itemsPerPage below what was asked for
+    page_size = items_per_page
+    if 0 < len(results) < items_per_page and len(results) < total:
+        page_size = len(results)
+    page_count = math.ceil(total / page_size) if page_size else 1
+    if page_count <= 1:
+        return
+
+    logger.debug("Fetching %d more page(s) of %s", page_count - 1, url)
+    pool = _get_page_pool()
+    fetch = partial(
+        _fetch_page,
+        url,
+        username,
+        apikey,
+        verify_ssl,
+        headers,
+        items_per_page=page_size,
+    )
+    page_nums = iter(range(2, page_count + 1))
+    # Keep at most max_workers pages of this listing in flight
+    pending: list[Future] = [
+        pool.submit(fetch, page_num) for page_num in islice(page_nums, max_workers)
+    ]
+    try:
+        while pending:
+            page = pending.pop(0).result()
+            next_page = next(page_nums, None)
+            if next_page is not None:
+                pending.append(pool.submit(fetch, next_page))
+            yield from page.get("results", [])
+    finally:
+        # Stop outstanding pages if the consumer stops early or a page failed
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,142 @@
+"""Random passwords for the database users created in Atlas.
+
+Passwords are generated in batches from os.urandom buffers. Random bytes are
+mapped onto the policy alphabet with rejection sampling, so every character
+is equally likely, and a password missing one of the required character
+classes is drawn again, so every valid password is equally likely.
+"""
+
+import os
+import string
+from dataclasses import dataclass
+from typing import Optional
+
+SPECIAL_CHARACTERS = "!@#$%^&*-_=+"
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    """Length and character classes of generated passwords.
+
+    Characters are drawn from the union of classes; every class listed in
+    required appears at least once in each password.
+    """
+
+    length: int = 20
+    classes: tuple[str, ...] = (
+        string.ascii_lowercase,
+        string.ascii_uppercase,
+        string.digits,
+        SPECIAL_CHARACTERS,
+    )
+    required: Optional[tuple[str, ...]] = None
+
+    def __post_init__(self) -> None:
+        alphabet = self.alphabet
+        if not alphabet or not alphabet.isascii() or len(alphabet) > 256:
+            raise ValueError("Password characters must be 1 to 256 ASCII characters")
+        required = self.required_classes
+        if any(not c or c not in self.classes for c in required):
+            raise ValueError("Required character classes must be non-empty classes")
+        if self.length < max(len(required), 1):
+            raise ValueError(
+                "Password length must be at least the number of required classes"
+            )
+
+    @property
+    def alphabet(self) -> str:
+        """Distinct characters of all classes, in class order."""
+        return "".join(dict.fromkeys("".join(self.classes)))
+
+    @property
+    def required_classes(self) -> tuple[str, ...]:
+        return self.classes if self.required is None else self.required
+
+
+DEFAULT_POLICY = PasswordPolicy()
+
+# Character classes by the names used in options and config files
+CHARACTER_CLASSES = {
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "digits": string.digits,
+    "special": SPECIAL_CHARACTERS,
+}
+
+
+def policy_from_names(
+    length: int, classes: str, required: Optional[str] = None
+) -> PasswordPolicy:
+    """Build a policy from comma separated CHARACTER_CLASSES names.
+
+    required defaults to every class in classes. Raises ValueError for an
+    unknown class name or an invalid policy.
+    """
+
+    def parse(names: str) -> tuple[str, ...]:
+        parsed = []
+        for name in (n.strip().lower() for n in names.split(",")):
+            if name not in CHARACTER_CLASSES:
+                raise ValueError(
+                    "Unknown character class %r, use %s"
+                    % (name, ", ".join(CHARACTER_CLASSES))
+                )
+            parsed.append(CHARACTER_CLASSES[name])
+        return tuple(dict.fromkeys(parsed))
+
+    return PasswordPolicy(
+        length=length,
+        classes=parse(classes),
+        required=None if required is None else parse(required),
+    )
+
+
+class PasswordGenerator:
+    """Batch password generator for one policy."""
+
+    def __init__(self, policy: PasswordPolicy = DEFAULT_POLICY):
+        self.policy = policy
+        alphabet = policy.alphabet.encode("ascii")
+        size = len(alphabet)
+        # Bytes at or above limit would make the first characters likelier
+        limit = 256 - 256 % size
+        self._table = bytes(alphabet[b % size] if b < limit else 0 for b in range(256))
+        self._rejected = bytes(range(limit, 256))
+        self._acceptance = limit / 256
+        self._required = [frozenset(c) for c in policy.required_classes]
+
+    def _characters(self, count: int) -> bytes:
+        """count uniformly distributed alphabet characters."""
+        chunks = []
+        missing = count
+        while missing > 0:
+            # Draw a little more than needed so one read is usually enough
+            raw = os.urandom(int(missing / self._acceptance * 1.1) + 16)
+            chunk = raw.translate(self._table, self._rejected)
+            chunks.append(chunk)
+            missing -= len(chunk)
+        return b"".join(chunks)[:count]
+
+    def generate(self, count: int) -> list[str]:
+        """Return count passwords."""
+        length = self.policy.length
+        passwords: list[str] = []
+        while len(passwords) < count:
+            needed = count - len(passwords)
+            characters = self._characters(needed * length).decode("ascii")
+            for start in range(0, needed * length, length):
+                password = characters[start : start + length]
+                present = set(password)
+                if all(not present.isdisjoint(c) for c in self._required):
+                    passwords.append(password)
+        return passwords
+
+    def generate_one(self) -> str:
+        return self.generate(1)[0]
+
+
+def generate_passwords(
+    count: int, policy: PasswordPolicy = DEFAULT_POLICY
+) -> list[str]:
+    """Return count random passwords following policy."""
+    return PasswordGenerator(policy).generate(count)
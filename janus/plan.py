@@ -0,0 +1,140 @@
+"""Migration plans written by `plan` and carried out by `apply`.
+
+A plan is built from an export file and the current state of the
+destination, without changing anything. It lists, project by project, what
+apply will create, what it skips because it already exists, and what cannot
+be created as exported (conflicts), together with an estimate of the API
+calls apply will make. The plan is a JSON document meant to be reviewed
+before a change window:
+
+    {
+      "kind": "janusPlan",
+      "formatVersion": 1,
+      "planKind": "dbUsers" | "alertConfigs",
+      "created": "...", "janusVersion": "...",
+      "destination": "<destination URL>",
+      "inputFile": "<export file>",
+      "projects": [
+        {"source": {"id", "name"}, "destination": {"id", "name"}, ...},
+      ],
+      "skippedProjects": [{"source": {...}, "reason": "..."}],
+      "summary": {...},
+    }
+
+What each project holds depends on planKind, see db_users_cli and
+alert_configs_cli. Plans hold no credentials and no passwords.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Optional
+
+from janus import __version__
+from janus.logging import logger
+from janus.mapping import AUTO
+
+PLAN_KIND = "janusPlan"
+PLAN_FORMAT_VERSION = 1
+
+# Project map used when none is given: same id, else same name
+AUTO_PROJECT_MAP = {"default": AUTO, "projects": {}}
+
+PlanDict = dict[str, Any]
+
+
+def new_plan(plan_kind: str, destination: str, input_file: str) -> PlanDict:
+    return {
+        "kind": PLAN_KIND,
+        "formatVersion": PLAN_FORMAT_VERSION,
+        "planKind": plan_kind,
+        "created": datetime.now().isoformat(),
+        "janusVersion": __version__,
+        "destination": destination,
+        "inputFile": input_file,
+        "projects": [],
+        "skippedProjects": [],
+        "summary": {},
+    }
+
+
+def skip_project(plan: PlanDict, source: dict[str, Any], reason: str) -> None:
+    plan["skippedProjects"].append(
+        {"source": {"id": source["id"], "name": source["name"]}, "reason": reason}
+    )
+
+
+def write_plan(path: str, plan: PlanDict) -> None:
+    """Write a plan atomically, readable by the current user only."""
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as outfile:
+        json.dump(plan, outfile, indent=2)
+        outfile.write("\n")
+    os.replace(tmp_path, path)
+
+
+def read_plan(path: str, plan_kind: str, destination: Optional[str] = None) -> PlanDict:
+    """Load a plan, checking it is a plan of plan_kind made for destination."""
+    with open(path, "r", encoding="utf-8") as infile:
+        plan = json.load(infile)
+    if not isinstance(plan, dict) or plan.get("kind") != PLAN_KIND:
+        raise ValueError(f"{path} is not a Janus plan")
+    if plan.get("formatVersion", 0) > PLAN_FORMAT_VERSION:
+        raise ValueError(
+            f"{path} uses plan format {plan['formatVersion']}, "
+            f"this Janus reads up to {PLAN_FORMAT_VERSION}"
+        )
+    if plan.get("planKind") != plan_kind:
+        raise ValueError(f"{path} is a {plan.get('planKind')} plan, not {plan_kind}")
+    if destination is not None and plan["destination"].rstrip("/") != (
+        destination.rstrip("/")
+    ):
+        raise ValueError(
+            f"{path} was planned for {plan['destination']}, not {destination}"
+        )
+    return plan
+
+
+def log_plan(plan: PlanDict) -> None:
+    """Log the conflicts and the summary of a plan."""
+    for project in plan["projects"]:
+        for conflict in project.get("conflicts", []):
+            logger.warning(
+                "%s → %s: %s %s: %s",
+                project["source"]["name"],
+                project["destination"]["name"],
+                conflict["type"],
+                conflict["name"],
+                conflict["reason"],
+            )
+    for skipped in plan["skippedProjects"]:
+        logger.info(
+            "Not planned: %s (%s): %s",
+            skipped["source"]["name"],
+            skipped["source"]["id"],
+            skipped["reason"],
+        )
+
+    summary = plan["summary"]
+    logger.info("")
+    logger.info(
+        "Plan: %d project(s), %d not planned",
+        len(plan["projects"]),
+        len(plan["skippedProjects"]),
+    )
+    for item, counts in summary["items"].items():
+        logger.info(
+            "  → %s: %d to create, %d to skip, %d conflict(s)",
+            item,
+            counts["create"],
+            counts["skip"],
+            counts["conflict"],
+        )
+    calls = summary["apiCalls"]
+    logger.info(
+        "  → Estimated API calls for apply: %d (%d GET, %d POST)",
+        calls["GET"] + calls["POST"],
+        calls["GET"],
+        calls["POST"],
+    )
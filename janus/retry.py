@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+# Status codes worth retrying. POST requests are only retried on the ones
+# returned before the request was processed, so a create is never sent twice.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+POST_RETRY_STATUSES = frozenset([429, 503])
+
+DEFAULT_MAX_RETRIES = 5
+# Default request budget, in requests per second per host
+DEFAULT_RATE_LIMIT = 20.0
+# Default number of requests in flight at once per host
+DEFAULT_HOST_CONCURRENCY = 32
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honoring Retry-After."""
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def should_retry(self, method: str, status: int, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if method == "POST":
+            return status in POST_RETRY_STATUSES
+        return status in RETRY_STATUSES
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number attempt + 1."""
+        seconds = parse_retry_after(retry_after)
+        if seconds is not None:
+            return min(seconds, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """Request budget for one host, shared by every worker talking to it.
+
+    The rate is adaptive: it is halved whenever the host answers 429 and
+    creeps back up to the configured rate as requests succeed.
+    """
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        if self.max_rate <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            capacity = max(self.rate, 1.0)
+            self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def throttled(self) -> None:
+        with self.lock:
+            self.rate = max(self.rate / 2, self.max_rate / 16)
+
+    def succeeded(self) -> None:
+        if self.rate < self.max_rate:
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+
+_policy = RetryPolicy()
+_rate_limit = DEFAULT_RATE_LIMIT
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+_host_concurrency = DEFAULT_HOST_CONCURRENCY
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_failures: list[dict[str, Any]] = []
+_failures_lock = threading.Lock()
+
+
+def configure(
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    rate_limit: float = DEFAULT_RATE_LIMIT,
+    host_concurrency: int = DEFAULT_HOST_CONCURRENCY,
+) -> None:
+    """Set the retry policy and per host request budget used for every API call."""
+    global _policy, _rate_limit, _host_concurrency
+    _policy = RetryPolicy(max_retries=max_retries)
+    _rate_limit = rate_limit
+    _host_concurrency = host_concurrency
+    with _buckets_lock:
+        _buckets.clear()
+        _host_slots.clear()
+
+
+def get_policy() -> RetryPolicy:
+    return _policy
+
+
+def get_bucket(host: str) -> TokenBucket:
+    bucket = _buckets.get(host)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.setdefault(host, TokenBucket(_rate_limit))
+    return bucket
+
+
+def get_host_concurrency() -> int:
+    return _host_concurrency
+
+
+def get_host_slots(host: str) -> threading.BoundedSemaphore:
+    """Semaphore bounding the requests in flight to host, shared by every worker."""
+    slots = _host_slots.get(host)
+    if slots is None:
+        with _buckets_lock:
+            slots = _host_slots.setdefault(
+                host, threading.BoundedSemaphore(_host_concurrency)
+            )
+    return slots
+
+
+def record_failure(
+    method: str,
+    url: str,
+    attempts: int,
+    status: Optional[int] = None,
+    error: Optional[str] = None,
+) -> None:
+    """Record a request that was still failing after every retry."""
+    with _failures_lock:
+        _failures.append(
+            {
+                "method": method,
+                "url": url,
+                "attempts": attempts,
+                "status": status,
+                "error": error,
+            }
+        )
+
+
+def get_request_failures() -> list[dict[str, Any]]:
+    with _failures_lock:
+        return list(_failures)
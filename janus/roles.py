@@ -0,0 +1,142 @@
+"""Dependency graph of the custom roles imported into one Atlas project.
+
+A custom role can inherit from built-in roles and from other custom roles.
+Atlas rejects a role whose inherited custom roles do not exist yet, so the
+roles are grouped into waves: every role of a wave only depends on built-in
+roles, roles already in the destination, or roles of earlier waves, and the
+roles of one wave can be created concurrently.
+"""
+
+from typing import Any, Iterable, Optional
+
+RoleDict = dict[str, Any]
+
+# Roles every MongoDB deployment and Atlas project provides
+BUILTIN_ROLES = frozenset(
+    [
+        "read",
+        "readWrite",
+        "dbAdmin",
+        "dbOwner",
+        "userAdmin",
+        "clusterAdmin",
+        "clusterManager",
+        "clusterMonitor",
+        "hostManager",
+        "enableSharding",
+        "backup",
+        "restore",
+        "readAnyDatabase",
+        "readWriteAnyDatabase",
+        "userAdminAnyDatabase",
+        "dbAdminAnyDatabase",
+        "root",
+        "directShardOperations",
+        "atlasAdmin",
+        "killOpSession",
+        "__system",
+        "__queryableBackup",
+    ]
+)
+
+
+def role_dependencies(role: RoleDict) -> set[str]:
+    """Names of the non built-in roles a role inherits from."""
+    return {
+        inherited.get("role")
+        for inherited in role.get("roles", [])
+        if inherited.get("role") not in BUILTIN_ROLES
+    }
+
+
+def plan_role_waves(
+    roles: list[RoleDict], existing: Optional[Iterable[str]] = None
+) -> tuple[list[list[RoleDict]], dict[str, str], list[RoleDict]]:
+    """Order roles into creation waves, without any API call.
+
+    Returns (waves, invalid, duplicates): waves lists the roles that can be
+    created, in file order within each wave, and invalid maps the name of
+    every role that cannot be created to the reason: a dependency that is
+    neither built in, existing nor imported, a dependency cycle, or a
+    dependency on such a role. Role names are unique in an Atlas project, so
+    only the first role of a name is planned; duplicates lists the later
+    roles defined differently, which are not created. When the existing
+    destination roles are unknown (None), dependencies outside roles are
+    assumed to exist.
+    """
+    known = existing is not None
+    existing = set(existing or ())
+    by_name: dict[str, RoleDict] = {}
+    duplicates: list[RoleDict] = []
+    for role in roles:
+        first = by_name.setdefault(role.get("role"), role)
+        if first != role:
+            duplicates.append(role)
+
+    invalid: dict[str, str] = {}
+    pending: dict[str, set[str]] = {}
+    for name, role in by_name.items():
+        dependencies = role_dependencies(role) - existing - {name}
+        if not known:
+            dependencies &= by_name.keys()
+        missing = sorted(d for d in dependencies if d not in by_name)
+        if missing:
+            invalid[name] = "missing inherited role(s) %s" % ", ".join(missing)
+        elif name in role_dependencies(role):
+            invalid[name] = "inherits from itself"
+        else:
+            pending[name] = dependencies
+
+    waves: list[list[RoleDict]] = []
+    while pending:
+        _block_dependents(pending, invalid)
+        ready = [name for name, dependencies in pending.items() if not dependencies]
+        if not ready:
+            break
+        waves.append([by_name[name] for name in ready])
+        for name in ready:
+            del pending[name]
+        for dependencies in pending.values():
+            dependencies.difference_update(ready)
+
+    # Whatever is left is in a cycle or depends on a role that is in one
+    for name, dependencies in pending.items():
+        if _reaches(pending, dependencies, name):
+            invalid[name] = "dependency cycle through %s" % ", ".join(
+                sorted(d for d in dependencies if _reaches(pending, {d}, name))
+            )
+        else:
+            invalid[name] = "depends on role(s) in a dependency cycle: %s" % (
+                ", ".join(sorted(dependencies))
+            )
+    return waves, invalid, duplicates
+
+
+def _block_dependents(pending: dict[str, set[str]], invalid: dict[str, str]) -> None:
+    """Move the roles depending on an invalid role, at any depth, to invalid."""
+    while True:
+        # Roles depending on an invalid role can never be created
+        blocked = {
+            name: sorted(dependencies & invalid.keys())
+            for name, dependencies in pending.items()
+            if dependencies & invalid.keys()
+        }
+        if not blocked:
+            return
+        for name, dependencies in blocked.items():
+            invalid[name] = "depends on invalid role(s) %s" % ", ".join(dependencies)
+            del pending[name]
+
+
+def _reaches(graph: dict[str, set[str]], start: set[str], target: str) -> bool:
+    """Whether target is reachable from the start nodes along graph edges."""
+    seen: set[str] = set()
+    stack = list(start)
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        if node not in seen:
+            seen.add(node)
+            stack.extend(graph.get(node, ()))
+    return False
@@ -0,0 +1,118 @@
+"""Existing custom roles and database users of the Atlas destination projects.
+
+With --skipExisting an import checks every role and user against what the
+destination already holds. DestinationSnapshot fetches the roles and users
+of each destination project in the background as soon as the project is
+known, across all pages, and keeps them in hash indexes, so a check costs
+one set lookup and projects do not wait for their own listings. Roles and
+users created by the import are added as the creates succeed.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from janus.executor import DEFAULT_CONCURRENCY
+from janus.logging import logger
+
+# Returns every item of a listing of one project
+Fetcher = Callable[[str], list[dict[str, Any]]]
+
+
+class DestinationSnapshot:
+    """Hash indexes of the roles and users of Atlas projects, loaded concurrently.
+
+    Roles are indexed by (project, roleName) and users by (project, username,
+    databaseName). A project whose listing could not be fetched is unknown:
+    role_names returns None for it and its users are never reported as
+    existing, so the creates themselves find out. fetch_roles and
+    fetch_users list all custom roles and database users of a project.
+    """
+
+    def __init__(
+        self,
+        fetch_roles: Fetcher,
+        fetch_users: Fetcher,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ):
+        self.fetch_roles = fetch_roles
+        self.fetch_users = fetch_users
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(concurrency, 1), thread_name_prefix="janus-snapshot"
+        )
+        self._loads: dict[str, Future] = {}
+        self._roles: dict[str, set[str]] = {}
+        self._users: dict[str, set[tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "DestinationSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def prefetch(self, project_id: str) -> None:
+        """Start loading a project in the background, once."""
+        with self._lock:
+            if project_id not in self._loads:
+                self._loads[project_id] = self._pool.submit(self._load, project_id)
+
+    def _load(self, project_id: str) -> None:
+        roles = self._fetch(self.fetch_roles, project_id, "custom roles")
+        if roles is not None:
+            names = {r.get("roleName") for r in roles if isinstance(r, dict)}
+            with self._lock:
+                self._roles.setdefault(project_id, set()).update(names)
+        users = self._fetch(self.fetch_users, project_id, "database users")
+        if users is not None:
+            keys = {(u.get("username"), u.get("databaseName")) for u in users}
+            with self._lock:
+                self._users.setdefault(project_id, set()).update(keys)
+        logger.debug(
+            "Destination project %s has %d custom role(s) and %d database user(s)",
+            project_id,
+            len(roles or ()),
+            len(users or ()),
+        )
+
+    def _fetch(
+        self, fetch: Fetcher, project_id: str, what: str
+    ) -> Optional[list[dict[str, Any]]]:
+        try:
+            return fetch(project_id)
+        except Exception as e:
+            logger.warning(
+                "Could not fetch existing %s of project %s: %s", what, project_id, e
+            )
+            return None
+
+    def _wait(self, project_id: str) -> None:
+        self.prefetch(project_id)
+        self._loads[project_id].result()
+
+    def role_names(self, project_id: str) -> Optional[set[str]]:
+        """Names of the custom roles in a project, or None when unknown."""
+        self._wait(project_id)
+        with self._lock:
+            names = self._roles.get(project_id)
+            return None if names is None else set(names)
+
+    def has_role(self, project_id: str, role_name: str) -> bool:
+        self._wait(project_id)
+        return role_name in self._roles.get(project_id, ())
+
+    def has_user(self, project_id: str, username: str, database: str) -> bool:
+        self._wait(project_id)
+        return (username, database) in self._users.get(project_id, ())
+
+    def _add(self, index: dict[str, set], project_id: str, key: Any) -> None:
+        with self._lock:
+            # Only known projects are indexed, an unknown one stays unknown
+            if project_id in index:
+                index[project_id].add(key)
+
+    def add_role(self, project_id: str, role_name: str) -> None:
+        self._add(self._roles, project_id, role_name)
+
+    def add_user(self, project_id: str, username: str, database: str) -> None:
+        self._add(self._users, project_id, (username, database))